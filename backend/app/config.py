@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 
@@ -6,6 +7,9 @@ load_dotenv()
 class Settings:
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+    # Optional cheap, low-latency model for short interactive tasks. Unset,
+    # every call goes to OPENAI_MODEL as before routing existed.
+    OPENAI_FAST_MODEL = os.getenv("OPENAI_FAST_MODEL", "")
     BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
     FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
     MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
@@ -16,8 +20,106 @@ class Settings:
     UPLOAD_RETENTION_HOURS = int(os.getenv("UPLOAD_RETENTION_HOURS", "24"))
     CLEANUP_INTERVAL_MINUTES = int(os.getenv("CLEANUP_INTERVAL_MINUTES", "60"))
 
+    # Full-text search index shared by all workers (SQLite FTS5 file)
+    SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "uploads/search_index.db")
+
+    # Glossary definitions and term document frequencies, shared by all
+    # workers (SQLite file)
+    GLOSSARY_STORE_PATH = os.getenv("GLOSSARY_STORE_PATH", "uploads/glossary.db")
+    # Most frequent candidate terms per report counted for glossary TF-IDF
+    GLOSSARY_TERMS_PER_DOCUMENT = int(os.getenv("GLOSSARY_TERMS_PER_DOCUMENT", "2000"))
+
+    # Reports preloaded with `python -m app.ingest`. Their PDFs are copied to
+    # LIBRARY_DIR, which the upload retention cleanup leaves alone.
+    REPORT_ARCHIVE_PATH = os.getenv("REPORT_ARCHIVE_PATH", "uploads/reports.db")
+    LIBRARY_DIR = os.getenv("LIBRARY_DIR", "uploads/library")
+    # Archived reports each worker keeps in memory (least recently used go)
+    ARCHIVE_CACHED_REPORTS = int(os.getenv("ARCHIVE_CACHED_REPORTS", "100"))
+
     # OpenAI Settings
     OPENAI_TEMPERATURE = 0.7
     OPENAI_MAX_TOKENS = 500
 
+    # Web worker processes serving the API. Gunicorn reads the same variable
+    # as its worker count; the admission layer splits the quota below evenly
+    # between workers because each keeps its own buckets.
+    WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+    # Account quota the admission layer paces model calls against (for the
+    # whole deployment, not per worker)
+    OPENAI_REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "500"))
+    OPENAI_TOKENS_PER_MINUTE = int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "200000"))
+
+    # Per-task deadline in seconds for a model call, covering queueing,
+    # retries and hedges. Keep these below nginx's proxy_read_timeout.
+    OPENAI_DEADLINES = {
+        "summarize": float(os.getenv("OPENAI_DEADLINE_SUMMARIZE", "90")),
+        "explain": float(os.getenv("OPENAI_DEADLINE_EXPLAIN", "20")),
+        "ask_question": float(os.getenv("OPENAI_DEADLINE_ASK_QUESTION", "45")),
+        "explain_equation": float(os.getenv("OPENAI_DEADLINE_EXPLAIN_EQUATION", "30")),
+        "extract_definitions": float(os.getenv("OPENAI_DEADLINE_EXTRACT_DEFINITIONS", "60")),
+        "define_terms": float(os.getenv("OPENAI_DEADLINE_DEFINE_TERMS", "30")),
+        "summarize_conversation": float(os.getenv("OPENAI_DEADLINE_SUMMARIZE_CONVERSATION", "60")),
+    }
+    OPENAI_DEFAULT_DEADLINE = float(os.getenv("OPENAI_DEFAULT_DEADLINE", "60"))
+    # Retries on 429s, timeouts, connection errors and 5xx responses, with
+    # jittered exponential backoff between attempts
+    OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+    OPENAI_RETRY_BASE_SECONDS = 0.5
+    OPENAI_RETRY_MAX_SECONDS = 8.0
+
+    # Latency-sensitive tasks that send a duplicate request when the first
+    # has not answered by the given latency percentile
+    OPENAI_HEDGE_TASKS = {
+        task.strip()
+        for task in os.getenv("OPENAI_HEDGE_TASKS", "explain,explain_equation,define_terms").split(",")
+        if task.strip()
+    }
+    OPENAI_HEDGE_PERCENTILE = float(os.getenv("OPENAI_HEDGE_PERCENTILE", "0.95"))
+    # Hedge delay used until enough latency samples have been observed
+    OPENAI_HEDGE_DELAY_SECONDS = float(os.getenv("OPENAI_HEDGE_DELAY_SECONDS", "4"))
+
+    # Model routing table, tried in order (list cheaper models first). A
+    # route serves a call when the task is in its `tasks` (empty = any task)
+    # and the prompt fits in `max_input_tokens`; `max_output_tokens` caps the
+    # completion. Override with a JSON list in OPENAI_MODEL_ROUTES. The
+    # default keeps every call on OPENAI_MODEL with no input cap (the last
+    # route should have the largest context window), and only puts short
+    # interactive work on OPENAI_FAST_MODEL when one is configured.
+    OPENAI_MODEL_ROUTES = json.loads(os.getenv("OPENAI_MODEL_ROUTES", "null")) or [
+        *([{
+            "model": OPENAI_FAST_MODEL,
+            "tasks": ["explain", "explain_equation", "define_terms", "ask_question"],
+            "max_input_tokens": 3000,
+            "max_output_tokens": 400,
+        }] if OPENAI_FAST_MODEL else []),
+        {
+            "model": OPENAI_MODEL,
+            "tasks": [],
+        },
+    ]
+    # A model whose recent p90 latency exceeds this fraction of the task's
+    # deadline is skipped while another route can take the call
+    OPENAI_ROUTE_LATENCY_FRACTION = float(os.getenv("OPENAI_ROUTE_LATENCY_FRACTION", "0.5"))
+    # Latency samples older than this are ignored, so a skipped model is
+    # tried again once its slow samples have aged out
+    OPENAI_LATENCY_WINDOW_SECONDS = float(os.getenv("OPENAI_LATENCY_WINDOW_SECONDS", "300"))
+
+    # Follow-up question sessions: recent turns kept verbatim, older ones
+    # folded into a rolling summary once the history exceeds the budget
+    CONVERSATION_TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "1500"))
+    CONVERSATION_KEEP_TURNS = int(os.getenv("CONVERSATION_KEEP_TURNS", "4"))
+    CONVERSATION_TTL_MINUTES = int(os.getenv("CONVERSATION_TTL_MINUTES", "120"))
+    CONVERSATION_MAX_SESSIONS = int(os.getenv("CONVERSATION_MAX_SESSIONS", "1000"))
+    # Conversations are shared by all workers through this SQLite file
+    CONVERSATION_STORE_PATH = os.getenv("CONVERSATION_STORE_PATH", "uploads/conversations.db")
+
+    # On-demand request profiling: requests carrying this token in the
+    # X-Profile-Token header are profiled. Empty = disabled.
+    PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+    PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "5"))
+    PROFILES_KEPT = int(os.getenv("PROFILES_KEPT", "20"))
+    # Shared by all workers, so any of them can serve a stored profile
+    PROFILES_DIR = os.getenv("PROFILES_DIR", "uploads/profiles")
+
 settings = Settings()
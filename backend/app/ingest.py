@@ -0,0 +1,169 @@
+"""Bulk-ingest a directory of PDF reports.
+
+    python -m app.ingest data/sample_reports [--workers N] [--no-recursive]
+
+PDFs are parsed, normalised and scanned for glossary terms in worker
+processes, one per core by default, then written to the report archive,
+the search index and the glossary's document frequencies by this process. Files whose content has already been ingested are skipped, so an
+interrupted run can simply be started again.
+"""
+import argparse
+import hashlib
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+import uuid
+from datetime import datetime
+from typing import List
+
+from app.config import settings
+from app.models.report import StoredReport
+from app.services.glossary import glossary_store
+from app.services.pdf_parser import PDFParser
+from app.services.report_archive import report_archive
+from app.services.search_index import search_index
+from app.services.term_extractor import TermExtractor
+from utils.text_cleaner import normalize_pages
+
+
+def find_pdfs(directory: str, recursive: bool = True) -> List[str]:
+    """Paths of every PDF under `directory`, in a stable order."""
+    if not recursive:
+        return sorted(
+            entry.path for entry in os.scandir(directory)
+            if entry.is_file() and entry.name.lower().endswith(".pdf")
+        )
+    found = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        found.extend(
+            os.path.join(root, name) for name in sorted(files)
+            if name.lower().endswith(".pdf")
+        )
+    return found
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_file(path: str) -> dict:
+    """Extract and normalise one PDF and find its glossary terms. Runs in a worker process."""
+    started = time.perf_counter()
+    try:
+        pages, cleaning = normalize_pages(PDFParser.extract_pages(path))
+        terms = TermExtractor.document_terms("\n".join(pages), settings.GLOSSARY_TERMS_PER_DOCUMENT)
+    except Exception as e:
+        return {"path": path, "error": str(e), "seconds": time.perf_counter() - started}
+    return {
+        "path": path,
+        "pages": pages,
+        "terms": terms,
+        "cleaning": cleaning,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def store_report(result: dict, content_hash: str) -> StoredReport:
+    """Copy the PDF into the library and record the report.
+
+    The id is derived from the content hash, so a run interrupted between
+    indexing and archiving re-indexes the same report instead of leaving
+    orphaned search entries or counting its glossary terms twice. The archive row is written last and marks the
+    file as done.
+    """
+    path = result["path"]
+    report_id = str(uuid.UUID(content_hash[:32]))
+    shutil.copyfile(path, os.path.join(settings.LIBRARY_DIR, f"{report_id}.pdf"))
+    report = StoredReport.from_pages(
+        id=report_id,
+        filename=os.path.basename(path),
+        file_size=os.path.getsize(path),
+        upload_date=datetime.now().isoformat(),
+        pages=result["pages"],
+    )
+    search_index.add_report(report)
+    glossary_store.register_document(report_id, result["terms"])
+    report_archive.save(report, content_hash)
+    return report
+
+
+def ingest(directory: str, workers: int = None, recursive: bool = True) -> dict:
+    """Ingest every new PDF under `directory`. Returns run totals."""
+    os.makedirs(settings.LIBRARY_DIR, exist_ok=True)
+    paths = find_pdfs(directory, recursive)
+    done = report_archive.ingested_hashes()
+
+    pending = {}
+    skipped = 0
+    for path in paths:
+        content_hash = file_hash(path)
+        if content_hash in done:
+            skipped += 1
+            continue
+        # Identical copies in the same run are parsed once
+        done.add(content_hash)
+        pending[path] = content_hash
+
+    print(f"📚 {len(paths)} PDF(s) found, {skipped} already ingested or duplicated, {len(pending)} to parse "
+          f"with {workers or os.cpu_count()} worker(s)")
+
+    totals = {"ingested": 0, "skipped": skipped, "failed": 0, "pages": 0, "bytes": 0}
+    started = time.perf_counter()
+    # Results are handled in completion order and dropped once stored, so
+    # memory stays flat however large the collection is
+    with multiprocessing.Pool(processes=workers) as pool:
+        results = pool.imap_unordered(parse_file, pending)
+        for position, result in enumerate(results, start=1):
+            name = os.path.relpath(result["path"], directory)
+            prefix = f"[{position}/{len(pending)}]"
+            if "error" in result:
+                totals["failed"] += 1
+                print(f"❌ {prefix} {name}: {result['error']}")
+                continue
+            try:
+                report = store_report(result, pending[result["path"]])
+            except Exception as e:
+                totals["failed"] += 1
+                print(f"❌ {prefix} {name}: {str(e)}")
+                continue
+            totals["ingested"] += 1
+            totals["pages"] += report.total_pages
+            totals["bytes"] += report.file_size
+            print(f"✅ {prefix} {name}: {report.total_pages} pages, parsed in "
+                  f"{result['seconds']:.2f}s, ~{result['cleaning']['tokens_saved']} tokens "
+                  f"normalised away ({report.id})")
+
+    elapsed = time.perf_counter() - started
+    totals["seconds"] = round(elapsed, 2)
+    rate = elapsed or 1e-9
+    print(f"🏁 Ingested {totals['ingested']} report(s), {totals['pages']} pages in {elapsed:.1f}s "
+          f"({totals['ingested'] / rate:.2f} files/s, {totals['pages'] / rate:.1f} pages/s, "
+          f"{totals['bytes'] / rate / 1e6:.2f} MB/s); {totals['skipped']} skipped, "
+          f"{totals['failed']} failed; {report_archive.count()} report(s) in archive")
+    return totals
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.ingest", description=__doc__.split("\n")[0])
+    parser.add_argument("directory", help="directory of PDF reports")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="parser processes (default: one per core)")
+    parser.add_argument("--no-recursive", dest="recursive", action="store_false",
+                        help="only ingest PDFs directly inside the directory")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"not a directory: {args.directory}")
+    totals = ingest(args.directory, args.workers, args.recursive)
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,9 +5,15 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
 
 from app.config import settings
-from app.routes import upload, ai_tools
+from app.routes import upload, ai_tools, search, reader, profiles
+from app.services.glossary import glossary_store
+from app.services.search_index import search_index
+from app.services.conversations import conversation_store
+from app.services.profiling import is_authorized, profile_request, profile_store
 
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
@@ -32,6 +38,8 @@ async def _cleanup_old_uploads() -> int:
     except FileNotFoundError:
         return 0
 
+    await asyncio.to_thread(conversation_store.prune)
+
     for entry in entries:
         if not entry.is_file() or not entry.name.lower().endswith(".pdf"):
             continue
@@ -49,6 +57,9 @@ async def _cleanup_old_uploads() -> int:
         # Best-effort eviction from the in-memory store
         file_id = entry.name[:-4]  # strip .pdf
         upload.reports_store.pop(file_id, None)
+        await asyncio.to_thread(glossary_store.unregister_document, file_id)
+        await asyncio.to_thread(search_index.remove_report, file_id)
+        await asyncio.to_thread(conversation_store.remove_report, file_id)
 
     return removed
 
@@ -68,6 +79,43 @@ async def _cleanup_loop() -> None:
         await asyncio.sleep(interval_seconds)
 
 
+class ProfilingMiddleware:
+    """Profile a single request when it carries the profiling token.
+
+    The profile id is returned in `X-Profile-Id`; download it from
+    `/api/profiles/{id}`. A plain ASGI middleware, so requests without the
+    header (streams included) pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # Header only: a query parameter would leak the token into access logs
+        token = Headers(scope=scope).get("x-profile-token")
+        method, path = scope["method"], scope["path"]
+        if not token or path.startswith("/api/profiles"):
+            await self.app(scope, receive, send)
+            return
+        if not is_authorized(token):
+            response = JSONResponse(status_code=403, content={"detail": "Invalid profiling token"})
+            await response(scope, receive, send)
+            return
+
+        with profile_request(method, path) as profile:
+            async def send_with_profile_id(message):
+                if message["type"] == "http.response.start":
+                    MutableHeaders(scope=message).append("X-Profile-Id", profile.id)
+                await send(message)
+
+            await self.app(scope, receive, send_with_profile_id)
+        await asyncio.to_thread(profile_store.add, profile)
+        print(f"🔬 Profiled {method} {path}: {profile.id}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Kick off the cleanup loop in the background (if enabled).
@@ -101,8 +149,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(ProfilingMiddleware)
+
 app.include_router(upload.router, prefix="/api", tags=["upload"])
 app.include_router(ai_tools.router, prefix="/api", tags=["ai"])
+app.include_router(search.router, prefix="/api", tags=["search"])
+app.include_router(reader.router, prefix="/api", tags=["reader"])
+app.include_router(profiles.router, prefix="/api", tags=["profiling"])
 
 
 @app.get("/")
@@ -112,11 +165,15 @@ async def root():
         "docs": "/docs",
         "endpoints": {
             "upload": "/api/upload",
+            "upload_stream": "/api/upload/stream",
             "summarize": "/api/summarize",
             "explain": "/api/explain",
             "ask_question": "/api/ask-question",
             "explain_equation": "/api/explain-equation",
             "convert_units": "/api/convert-units",
+            "search": "/api/search",
+            "search_stats": "/api/search/stats",
+            "reader_session": "/api/reader/{report_id} (WebSocket)",
         },
     }
 
@@ -1,5 +1,6 @@
+from array import array
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Iterator, Optional, List
 
 class ReportMetadata(BaseModel):
     filename: str
@@ -35,3 +36,114 @@ class UnitConversionRequest(BaseModel):
 class EquationRequest(BaseModel):
     equation: str
     context: Optional[str] = None
+
+
+class StoredReport:
+    """Compact in-memory record for an uploaded report.
+
+    The text of every page lives in one contiguous ``text`` buffer (each page
+    followed by a newline) and ``page_offsets`` holds the start offset of
+    each page in an array, so page text is sliced out on demand instead of
+    being stored a second time.
+
+    Pages can also be appended one at a time while a PDF is still being
+    parsed; ``status`` is ``"parsing"`` until the last page has arrived.
+    Appended pages are kept as separate strings until ``text`` is read.
+    """
+
+    __slots__ = (
+        "id", "filename", "file_size", "upload_date", "status",
+        "expected_pages", "page_offsets", "_buffer", "_pending", "_length",
+    )
+
+    def __init__(self, id: str, filename: str, file_size: int, upload_date: str,
+                 text: str = "", page_offsets: Optional[array] = None,
+                 status: str = "ready", expected_pages: Optional[int] = None):
+        self.id = id
+        self.filename = filename
+        self.file_size = file_size
+        self.upload_date = upload_date
+        self.status = status
+        self.page_offsets = page_offsets if page_offsets is not None else array("L")
+        self.expected_pages = expected_pages if expected_pages is not None else len(self.page_offsets)
+        self._buffer = text
+        self._pending: List[str] = []
+        self._length = len(text)
+
+    @classmethod
+    def from_pages(cls, id: str, filename: str, file_size: int, upload_date: str,
+                   pages: List[str]) -> "StoredReport":
+        """Build a report from a list of page strings."""
+        report = cls(id, filename, file_size, upload_date)
+        report.replace_pages(pages)
+        return report
+
+    @property
+    def text(self) -> str:
+        # Pages appended during parsing are joined into the buffer only
+        # here, not per page, so streaming a report stays linear in its size
+        if self._pending:
+            self._buffer += "".join(self._pending)
+            self._pending.clear()
+        return self._buffer
+
+    @property
+    def total_pages(self) -> int:
+        return len(self.page_offsets)
+
+    @property
+    def file_path(self) -> str:
+        return f"/api/pdf/{self.id}"
+
+    def replace_pages(self, pages: List[str]) -> None:
+        """Swap in a new text for every page (e.g. after normalisation)."""
+        offsets = array("L")
+        position = 0
+        for page_text in pages:
+            offsets.append(position)
+            position += len(page_text) + 1
+        self._buffer = "".join(f"{page_text}\n" for page_text in pages)
+        self._pending.clear()
+        self._length = position
+        self.page_offsets = offsets
+        self.expected_pages = max(self.expected_pages, len(offsets))
+
+    def append_page(self, page_text: str) -> int:
+        """Append the next page and return its 1-based page number."""
+        self.page_offsets.append(self._length)
+        self._pending.append(f"{page_text}\n")
+        self._length += len(page_text) + 1
+        return len(self.page_offsets)
+
+    def page_text(self, page_number: int) -> str:
+        """Return the text of a 1-based page number."""
+        index = page_number - 1
+        if index < 0 or index >= len(self.page_offsets):
+            raise IndexError(f"Page {page_number} out of range")
+        pending_index = index - (len(self.page_offsets) - len(self._pending))
+        if pending_index >= 0:
+            return self._pending[pending_index][:-1]
+        start = self.page_offsets[index]
+        if index + 1 < len(self.page_offsets):
+            end = self.page_offsets[index + 1] - 1
+        else:
+            end = self._length - 1
+        return self._buffer[start:end]
+
+    def iter_pages(self) -> Iterator[dict]:
+        for page_number in range(1, len(self.page_offsets) + 1):
+            yield {"page_number": page_number, "text": self.page_text(page_number)}
+
+    def to_dict(self) -> dict:
+        """Serialise to the JSON shape the frontend expects (`ReportData`)."""
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "file_size": self.file_size,
+            "upload_date": self.upload_date,
+            "status": self.status,
+            "total_pages": self.total_pages,
+            "text": self.text,
+            "pages": list(self.iter_pages()),
+            "file_path": self.file_path,
+        }
@@ -1,8 +1,19 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
+from typing import Optional
 from app.services.chatgpt_service import ChatGPTService
 from app.services.unit_converter import UnitConverter
 from app.services.pdf_parser import PDFParser
+from app.services.glossary import glossary_store
+from app.services.term_extractor import TermExtractor
+from app.services.llm_admission import admission
+from app.services.llm_latency import latency_tracker
+from app.services.model_router import model_router
+from app.services.conversations import conversation_store
+from app.routes.upload import get_stored_report
+from app.services.profiling import stage
 from app.models.report import (
     SummaryRequest, HighlightRequest, QuestionRequest, 
     UnitConversionRequest, EquationRequest
@@ -10,35 +21,100 @@ from app.models.report import (
 
 router = APIRouter()
 
+# Highlights up to this many words are treated as a single glossary term
+GLOSSARY_TERM_MAX_WORDS = 3
+
 # Define request model for ask-question
 class AskQuestionRequest(BaseModel):
     question: str
     report_text: str = ""
+    # Set report_id to keep follow-up context on the server; the response
+    # returns the conversation_id to send with the next question
+    report_id: Optional[str] = None
+    conversation_id: Optional[str] = None
+
+async def answer_question(question: str, report_text: str = "",
+                          report_id: Optional[str] = None,
+                          conversation_id: Optional[str] = None) -> dict:
+    """Answer a question, continuing a server-side conversation if asked to.
+    
+    A new conversation is started for a `report_id` without a
+    `conversation_id`; an unknown `conversation_id` or a `report_id` with
+    no stored report (and no `report_text`) is a 404, and a conversation
+    started for a different report is a 409.
+    """
+    conversation = None
+    if conversation_id:
+        conversation = await asyncio.to_thread(conversation_store.get, conversation_id)
+        if conversation is None:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        if report_id and conversation.report_id != report_id:
+            raise HTTPException(status_code=409, detail="Conversation belongs to another report")
+        report_id = conversation.report_id
+    
+    if not report_text and report_id:
+        report = await get_stored_report(report_id)
+        if report is None:
+            raise HTTPException(status_code=404, detail="Report not found")
+        report_text = report.text
+    
+    print(f"❓ Answering question: {question[:100]}")
+    print(f"📄 Using {len(report_text)} characters of report context")
+    
+    if conversation is None and not report_id:
+        answer = await ChatGPTService.ask_question(question, report_text)
+        return {"answer": answer}
+    
+    if conversation is None:
+        conversation = await asyncio.to_thread(conversation_store.create, report_id)
+    answer = await ChatGPTService.ask_question(
+        question,
+        report_text,
+        history=conversation.messages()
+    )
+    await asyncio.to_thread(conversation_store.add_turn, conversation, question, answer)
+    conversation_store.schedule_compaction(conversation)
+    return {"answer": answer, "conversation_id": conversation.id}
 
 @router.post("/ask-question")
 async def ask_question(request: AskQuestionRequest):
     """Ask a question about the report with full document context."""
     try:
         question = request.question
-        report_text = request.report_text
         
         if not question or len(question.strip()) == 0:
             raise ValueError("Question is required")
         
-        print(f"❓ Answering question: {question[:100]}")
-        print(f"📄 Using {len(report_text)} characters of report context")
-        
-        answer = await ChatGPTService.ask_question(
+        result = await answer_question(
             question,
-            report_text
+            request.report_text,
+            report_id=request.report_id,
+            conversation_id=request.conversation_id
         )
         
         print(f"✅ Question answered successfully")
-        return {"answer": answer}
+        return result
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Ask question error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/conversations/{conversation_id}")
+async def get_conversation(conversation_id: str):
+    """Get the rolling summary and recent turns of a conversation."""
+    conversation = await asyncio.to_thread(conversation_store.get, conversation_id)
+    if conversation is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return conversation.to_dict()
+
+@router.delete("/conversations/{conversation_id}")
+async def delete_conversation(conversation_id: str):
+    """Forget a conversation so the next question starts fresh."""
+    if not await asyncio.to_thread(conversation_store.delete, conversation_id):
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return {"deleted": conversation_id}
+
 @router.post("/summarize")
 async def summarize(request: SummaryRequest):
     """Summarize report text using ChatGPT."""
@@ -58,6 +134,34 @@ async def summarize(request: SummaryRequest):
         print(f"Summarize error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Summarization failed: {str(e)}")
 
+def is_glossary_term(text: str) -> bool:
+    """Short highlights that stored reports use as candidate terms.
+    
+    Reads the glossary store; call through `asyncio.to_thread`.
+    """
+    return len(text.split()) <= GLOSSARY_TERM_MAX_WORDS and glossary_store.is_candidate(text)
+
+async def explain_with_glossary(highlighted_text: str, context: str = "") -> dict:
+    """Explain a highlight, answering candidate terms from the shared glossary.
+    
+    Glossary entries hold general, context-free definitions, so they are safe
+    to serve to every report; anything else gets a contextual explanation
+    that is never stored.
+    """
+    if await asyncio.to_thread(is_glossary_term, highlighted_text):
+        term = highlighted_text.strip()
+        entry = await asyncio.to_thread(glossary_store.get, term)
+        if entry is None:
+            definition = (await ChatGPTService.define_terms([term])).get(term)
+            if definition:
+                entry = await asyncio.to_thread(glossary_store.add, term, definition, "model")
+        if entry is not None:
+            print(f"Explanation served from glossary: {entry['term']}")
+            return {"explanation": entry["definition"], "source": "glossary"}
+    
+    explanation = await ChatGPTService.explain(highlighted_text, context)
+    return {"explanation": explanation}
+
 @router.post("/explain")
 async def explain(request: HighlightRequest):
     """Explain highlighted text using ChatGPT."""
@@ -67,12 +171,9 @@ async def explain(request: HighlightRequest):
         if not request.highlighted_text or len(request.highlighted_text.strip()) == 0:
             raise ValueError("Highlighted text is required")
         
-        explanation = await ChatGPTService.explain(
-            request.highlighted_text,
-            request.context or ""
-        )
-        print(f"Explanation result: {explanation[:100]}")
-        return {"explanation": explanation}
+        result = await explain_with_glossary(request.highlighted_text, request.context or "")
+        print(f"Explanation result: {result['explanation'][:100]}")
+        return result
     except Exception as e:
         print(f"Explain error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Explanation failed: {str(e)}")
@@ -92,6 +193,18 @@ async def explain_equation(request: EquationRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def rank_candidates(text: str) -> list:
+    """Candidate terms of a text, ranked against the stored reports.
+    
+    Reads document frequencies from the glossary store; call through
+    `asyncio.to_thread`.
+    """
+    return TermExtractor.extract_candidates(
+        text,
+        glossary_store.document_frequency,
+        glossary_store.document_count,
+    )
+
 @router.post("/extract-definitions")
 async def extract_definitions(request: dict):
     """Extract definitions from text."""
@@ -103,10 +216,58 @@ async def extract_definitions(request: dict):
         
         print(f"Extract definitions request: text length = {len(text)}")
         
-        result = await ChatGPTService.extract_definitions(text)
-        print(f"Definitions result: {result}")
+        # Find candidate terms locally; a short selection is a single term
+        if len(text.split()) <= GLOSSARY_TERM_MAX_WORDS:
+            candidates = [{"term": text.strip(), "source": "selection"}]
+        else:
+            candidates = await asyncio.to_thread(rank_candidates, text)
+        if not candidates:
+            return await ChatGPTService.extract_definitions(text)
         
-        return result
+        # Acronym expansions and "X is defined as" sentences describe this
+        # text only, so they are returned but never shared. Other terms are
+        # served from the shared glossary; the rest go to the model with no
+        # context, so the definitions are safe to share. A selection is only
+        # stored if reports use it as a candidate term.
+        entries = {}
+        missing = []
+        for candidate in candidates:
+            if candidate.get("definition"):
+                entries[candidate["term"]] = {
+                    "term": candidate["term"],
+                    "definition": candidate["definition"],
+                    "source": candidate["source"],
+                }
+                continue
+            entry = await asyncio.to_thread(glossary_store.get, candidate["term"])
+            if entry is None:
+                missing.append(candidate["term"])
+            else:
+                entries[candidate["term"]] = entry
+        
+        if missing:
+            defined = await ChatGPTService.define_terms(missing)
+            for term, definition in defined.items():
+                shared = (
+                    candidates[0]["source"] != "selection"
+                    or await asyncio.to_thread(is_glossary_term, term)
+                )
+                if shared:
+                    entries[term] = await asyncio.to_thread(glossary_store.add, term, definition, "model")
+                else:
+                    entries[term] = {"term": term, "definition": definition, "source": "model"}
+        
+        terms = [
+            {"term": c["term"], "definition": entries[c["term"]]["definition"], "source": entries[c["term"]]["source"]}
+            for c in candidates if c["term"] in entries
+        ]
+        print(f"Definitions result: {len(terms)} terms ({len(missing)} sent to model)")
+        
+        return {
+            "definitions": "\n".join(f"{t['term']}: {t['definition']}" for t in terms),
+            "terms": terms,
+            "model_terms": len(missing),
+        }
     except Exception as e:
         print(f"Extract definitions error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Definition extraction failed: {str(e)}")
@@ -132,6 +293,16 @@ async def convert_units(request: UnitConversionRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/llm-status")
+async def llm_status():
+    """Queue depth, rate-limit budget, model routes, latencies and glossary size."""
+    return {
+        **admission.stats(),
+        "routes": model_router.stats(),
+        "latency": latency_tracker.stats(),
+        "glossary": await asyncio.to_thread(glossary_store.stats),
+    }
+
 @router.get("/conversions")
 async def get_conversions():
     """Get available unit conversions."""
@@ -148,14 +319,16 @@ async def detect_equations(request: dict):
         
         print(f"🔍 Detecting equations from text ({len(text)} chars)...")
         
-        equations = PDFParser.detect_equations(text)
+        with stage("equation_scan", chars=len(text)):
+            equations = PDFParser.detect_equations(text)
         
         print(f"✅ Found {len(equations)} equations")
         
-        return {
-            "equations": equations,
-            "count": len(equations)
-        }
+        with stage("serialization"):
+            return JSONResponse({
+                "equations": equations,
+                "count": len(equations)
+            })
     except Exception as e:
         print(f"❌ Equation detection error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Equation detection failed: {str(e)}")
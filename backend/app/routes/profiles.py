@@ -0,0 +1,36 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from app.services.profiling import is_authorized, profile_store
+
+router = APIRouter()
+
+
+def _require_token(request: Request) -> None:
+    if not is_authorized(request.headers.get("X-Profile-Token")):
+        raise HTTPException(status_code=403, detail="Profiling token required")
+
+@router.get("/profiles")
+async def list_profiles(request: Request):
+    """List the most recent request profiles."""
+    _require_token(request)
+    return {"profiles": await asyncio.to_thread(profile_store.list)}
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str, request: Request, format: str = "json"):
+    """Download a profile as JSON, or as folded stacks with `format=folded`.
+
+    Folded output can be fed straight to flamegraph.pl or opened in
+    speedscope.
+    """
+    _require_token(request)
+    profile = await asyncio.to_thread(profile_store.get, profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "folded":
+        return PlainTextResponse(
+            profile["folded"],
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'},
+        )
+    return profile
@@ -0,0 +1,184 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from app.services.chatgpt_service import ChatGPTService
+from app.services.unit_converter import UnitConverter
+from app.routes.ai_tools import answer_question, explain_with_glossary
+
+router = APIRouter()
+
+# In-flight requests allowed per reader connection
+MAX_IN_FLIGHT = 8
+
+
+async def _explain(report_id: str, message: dict) -> dict:
+    text = message.get("highlighted_text", "")
+    if not text.strip():
+        raise ValueError("Highlighted text is required")
+    return await explain_with_glossary(text, message.get("context") or "")
+
+
+async def _equation(report_id: str, message: dict) -> dict:
+    equation = message.get("equation", "")
+    if not equation.strip():
+        raise ValueError("Equation is required")
+    explanation = await ChatGPTService.explain_equation(equation, message.get("context") or "")
+    return {"explanation": explanation}
+
+
+async def _ask(report_id: str, message: dict) -> dict:
+    question = message.get("question", "")
+    if not question.strip():
+        raise ValueError("Question is required")
+    return await answer_question(
+        question,
+        message.get("report_text") or "",
+        report_id=report_id,
+        conversation_id=message.get("conversation_id"),
+    )
+
+
+async def _convert(report_id: str, message: dict) -> dict:
+    result = UnitConverter.convert(
+        float(message["value"]), message["from_unit"], message["to_unit"]
+    )
+    if result is None:
+        raise ValueError("Conversion not available")
+    return {
+        "value": message["value"],
+        "from_unit": message["from_unit"],
+        "to_unit": message["to_unit"],
+        "result": result,
+    }
+
+
+HANDLERS = {
+    "explain": _explain,
+    "equation": _equation,
+    "ask": _ask,
+    "convert": _convert,
+}
+
+
+class ReaderSession:
+    """One reader's WebSocket connection and its in-flight requests.
+
+    Requests run concurrently and results are sent back tagged with the
+    client's request id as each finishes. A `cancel` message, or a request
+    listing ids under `supersedes`, cancels those requests, which aborts
+    their upstream model calls.
+    """
+
+    def __init__(self, websocket: WebSocket, report_id: str):
+        self.websocket = websocket
+        self.report_id = report_id
+        self.tasks: dict[str, asyncio.Task] = {}
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, payload: dict) -> None:
+        async with self._send_lock:
+            await self.websocket.send_json(payload)
+
+    def cancel(self, request_id: str) -> bool:
+        task = self.tasks.get(request_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def _run(self, request_id: str, kind: str, message: dict) -> None:
+        try:
+            result = await HANDLERS[kind](self.report_id, message)
+            await self.send({"id": request_id, "type": "result", "kind": kind, "result": result})
+        except asyncio.CancelledError:
+            print(f"🛑 Reader request cancelled: {request_id} ({kind})")
+            raise
+        except HTTPException as e:
+            await self.send({
+                "id": request_id, "type": "error", "kind": kind,
+                "status": e.status_code, "detail": e.detail,
+            })
+        except Exception as e:
+            print(f"❌ Reader {kind} error: {str(e)}")
+            await self.send({"id": request_id, "type": "error", "kind": kind, "detail": str(e)})
+
+    def _forget(self, request_id: str, task: asyncio.Task) -> None:
+        if self.tasks.get(request_id) is task:
+            del self.tasks[request_id]
+
+    async def handle(self, message: dict) -> None:
+        request_id = str(message.get("id", ""))
+        kind = message.get("type")
+        supersedes = message.get("supersedes") or []
+        if not isinstance(kind, str) or not isinstance(supersedes, list):
+            await self.send({
+                "id": request_id, "type": "error",
+                "detail": "`type` must be a string and `supersedes` a list of request ids",
+            })
+            return
+
+        cancel_ids = [str(superseded) for superseded in supersedes]
+        if kind == "cancel":
+            cancel_ids.append(request_id)
+        for cancel_id in cancel_ids:
+            if self.cancel(cancel_id):
+                await self.send({"id": cancel_id, "type": "cancelled"})
+        if kind == "cancel":
+            return
+        if kind == "ping":
+            await self.send({"id": request_id, "type": "pong"})
+            return
+        if not request_id:
+            await self.send({"type": "error", "detail": "Every request needs an id"})
+            return
+        if kind not in HANDLERS:
+            await self.send({"id": request_id, "type": "error", "detail": f"Unknown request type: {kind}"})
+            return
+        if request_id in self.tasks:
+            await self.send({"id": request_id, "type": "error", "detail": "Request id already in flight"})
+            return
+        if len(self.tasks) >= MAX_IN_FLIGHT:
+            await self.send({"id": request_id, "type": "error", "detail": "Too many requests in flight"})
+            return
+
+        task = asyncio.create_task(self._run(request_id, kind, message))
+        task.add_done_callback(lambda done: self._forget(request_id, done))
+        self.tasks[request_id] = task
+
+    async def close(self) -> None:
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@router.websocket("/reader/{report_id}")
+async def reader_session(websocket: WebSocket, report_id: str):
+    """Multiplex explain/equation/ask/convert requests over one connection.
+
+    Client messages are JSON objects with an `id`, a `type` (`explain`,
+    `equation`, `ask`, `convert`, `cancel` or `ping`) and the same fields
+    as the matching HTTP route; `supersedes` lists request ids to cancel.
+    """
+    await websocket.accept()
+    session = ReaderSession(websocket, report_id)
+    print(f"🔌 Reader session opened for report {report_id}")
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except (ValueError, KeyError):
+                # A malformed or binary (KeyError) frame is the client's
+                # problem; keep the session and its in-flight requests alive
+                await session.send({"type": "error", "detail": "Messages must be valid JSON"})
+                continue
+            if not isinstance(message, dict):
+                await session.send({"type": "error", "detail": "Messages must be JSON objects"})
+                continue
+            await session.handle(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await session.close()
+        print(f"🔌 Reader session closed for report {report_id}")
@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+from fastapi import APIRouter, HTTPException, Query
+from app.services.search_index import search_index
+
+router = APIRouter()
+
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, description="Words or \"quoted phrases\" to find"),
+    limit: int = Query(20, ge=1, le=100),
+    report_id: str | None = None,
+):
+    """Search the page text of all uploaded reports."""
+    try:
+        started = time.perf_counter()
+        hits = await asyncio.to_thread(search_index.search, q, limit, report_id)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        return {
+            "query": q,
+            "hits": hits,
+            "count": len(hits),
+            "took_ms": round(elapsed_ms, 2),
+        }
+    except Exception as e:
+        print(f"❌ Search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+@router.get("/search/stats")
+async def search_stats():
+    """Reports and pages currently in the search index."""
+    return await asyncio.to_thread(search_index.stats)
@@ -1,10 +1,22 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 from app.services.pdf_parser import PDFParser
+from app.services.glossary import glossary_store
+from app.services.report_archive import report_archive
+from app.services.search_index import search_index
+from app.services.term_extractor import TermExtractor
 from app.config import settings
+from app.models.report import StoredReport
+from app.services.profiling import detached_task, stage
+from utils.text_cleaner import clean_page, normalize_pages
+import asyncio
+import json
+from collections import OrderedDict
 import os
 from datetime import datetime
 import uuid
 import shutil
+from typing import Optional
 
 router = APIRouter()
 
@@ -12,66 +24,274 @@ UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 # Store reports in memory (use database in production)
-reports_store = {}
+reports_store: dict[str, StoredReport] = {}
+
+# Background parses started by `/upload/stream`, kept referenced until done
+_parse_tasks: set[asyncio.Task] = set()
+
+# Ids of reports loaded from the bulk-ingest archive, least recently used first
+_archived_lru: "OrderedDict[str, None]" = OrderedDict()
+
+
+async def register_terms(report: StoredReport) -> None:
+    """Count a report's candidate terms in the glossary, off the event loop."""
+    terms = await asyncio.to_thread(
+        TermExtractor.document_terms, report.text, settings.GLOSSARY_TERMS_PER_DOCUMENT
+    )
+    await asyncio.to_thread(glossary_store.register_document, report.id, terms)
+
+
+async def get_stored_report(report_id: str) -> Optional[StoredReport]:
+    """Look up a report, loading it from the bulk-ingest archive if needed.
+
+    Archived reports stay cached in `reports_store` until they are among
+    the least recently used beyond `ARCHIVE_CACHED_REPORTS`. Their glossary
+    terms are counted at ingest, whether or not they are cached.
+    """
+    report = reports_store.get(report_id)
+    if report is not None:
+        if report_id in _archived_lru:
+            _archived_lru.move_to_end(report_id)
+        return report
+
+    report = await asyncio.to_thread(report_archive.load, report_id)
+    if report is None:
+        return None
+    reports_store[report_id] = report
+    _archived_lru[report_id] = None
+    # Reports archived before ingest started counting glossary terms
+    if not await asyncio.to_thread(glossary_store.has_document, report_id):
+        await register_terms(report)
+    while len(_archived_lru) > settings.ARCHIVE_CACHED_REPORTS:
+        evicted, _ = _archived_lru.popitem(last=False)
+        reports_store.pop(evicted, None)
+    return report
+
+
+async def _save_upload(file: UploadFile) -> tuple[str, str]:
+    """Validate an uploaded PDF and write it to disk. Returns (id, path)."""
+    if file.size > settings.MAX_FILE_SIZE:
+        raise HTTPException(status_code=413, detail="File too large")
+
+    if not file.filename.endswith('.pdf'):
+        raise HTTPException(status_code=400, detail="Only PDF files allowed")
+
+    file_id = str(uuid.uuid4())
+    file_path = os.path.join(UPLOAD_DIR, f"{file_id}.pdf")
+
+    with stage("file_write"):
+        content = await file.read()
+        with open(file_path, 'wb') as f:
+            f.write(content)
+    return file_id, file_path
+
 
 @router.post("/upload")
 async def upload_report(file: UploadFile = File(...)):
     """Upload a PDF report."""
     try:
-        # Validate file
-        if file.size > settings.MAX_FILE_SIZE:
-            raise HTTPException(status_code=413, detail="File too large")
-        
-        if not file.filename.endswith('.pdf'):
-            raise HTTPException(status_code=400, detail="Only PDF files allowed")
-        
         # Save file
-        file_id = str(uuid.uuid4())
-        file_path = os.path.join(UPLOAD_DIR, f"{file_id}.pdf")
-        
-        content = await file.read()
-        with open(file_path, 'wb') as f:
-            f.write(content)
-        
-        # Extract text
-        text = PDFParser.extract_text(file_path)
-        pages = PDFParser.extract_text_by_page(file_path)
-        
+        file_id, file_path = await _save_upload(file)
+
+        # Extract text (one pass; the full text is built from the pages) and
+        # strip headers, footers and layout noise before anything stores it
+        raw_pages = PDFParser.extract_pages(file_path)
+        with stage("normalize"):
+            pages, cleaning = normalize_pages(raw_pages)
+
         # Store report metadata
-        report_data = {
-            "id": file_id,
-            "filename": file.filename,
-            "file_size": file.size,
-            "upload_date": datetime.now().isoformat(),
-            "total_pages": len(pages),
-            "text": text,
-            "pages": pages,
-            "file_path": f"/api/pdf/{file_id}"
-        }
-        reports_store[file_id] = report_data
-        
-        print(f"✅ Report uploaded: {file.filename} ({file_id})")
-        return report_data
-    
+        report = StoredReport.from_pages(
+            id=file_id,
+            filename=file.filename,
+            file_size=file.size,
+            upload_date=datetime.now().isoformat(),
+            pages=pages,
+        )
+        reports_store[file_id] = report
+        with stage("term_index"):
+            await register_terms(report)
+        with stage("search_index"):
+            await asyncio.to_thread(search_index.add_report, report)
+
+        print(f"✅ Report uploaded: {file.filename} ({file_id}), "
+              f"normalisation saved ~{cleaning['tokens_saved']} tokens")
+        with stage("serialization"):
+            return JSONResponse({**report.to_dict(), "normalization": cleaning})
+
+    except Exception as e:
+        print(f"❌ Upload error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+async def _parse_report(report: StoredReport, file_path: str, progress: asyncio.Condition) -> None:
+    """Extract pages one at a time, publishing each to the stored report.
+
+    Each page is cleaned as it arrives; page numbers and boilerplate
+    repeated across pages can only be detected once all pages are in, so
+    the stored text is normalised again at the end and the stream resends
+    any page that changed.
+    """
+    try:
+        pdf_reader = await asyncio.to_thread(PDFParser.open_document, file_path)
+        async with progress:
+            report.expected_pages = len(pdf_reader.pages)
+            progress.notify_all()
+        raw_pages = []
+        for index in range(report.expected_pages):
+            page_text = await asyncio.to_thread(PDFParser.extract_page, pdf_reader, index)
+            raw_pages.append(page_text)
+            async with progress:
+                report.append_page(clean_page(page_text))
+                progress.notify_all()
+        pages, cleaning = await asyncio.to_thread(normalize_pages, raw_pages)
+        report.replace_pages(pages)
+        print(f"🧹 Normalisation saved ~{cleaning['tokens_saved']} tokens ({report.id})")
+        await register_terms(report)
+        await asyncio.to_thread(search_index.add_report, report)
+        report.status = "ready"
+        print(f"✅ Report parsed: {report.filename} ({report.id}, {report.total_pages} pages)")
+    except Exception as e:
+        report.status = "failed"
+        print(f"❌ Streaming parse error ({report.id}): {str(e)}")
+    finally:
+        async with progress:
+            progress.notify_all()
+
+
+async def _stream_pages(report: StoredReport, progress: asyncio.Condition):
+    """Yield NDJSON events for a report as its pages become available."""
+    yield json.dumps({
+        "event": "report",
+        "id": report.id,
+        "filename": report.filename,
+        "file_size": report.file_size,
+        "upload_date": report.upload_date,
+        "file_path": report.file_path,
+        "status": report.status,
+    }) + "\n"
+
+    # Hashes of the page texts sent, to spot pages changed by the final
+    # normalisation without keeping a second copy of the text
+    sent_hashes: list[int] = []
+    while True:
+        async with progress:
+            await progress.wait_for(
+                lambda: report.total_pages > len(sent_hashes) or report.status != "parsing"
+            )
+        while len(sent_hashes) < report.total_pages:
+            page_number = len(sent_hashes) + 1
+            text = report.page_text(page_number)
+            sent_hashes.append(hash(text))
+            yield json.dumps({
+                "event": "page",
+                "page_number": page_number,
+                "total_pages": report.expected_pages,
+                "text": text,
+            }) + "\n"
+        if report.status != "parsing":
+            break
+
+    if report.status == "ready":
+        for page_number, sent_hash in enumerate(sent_hashes, start=1):
+            text = report.page_text(page_number)
+            if hash(text) != sent_hash:
+                yield json.dumps({
+                    "event": "page",
+                    "page_number": page_number,
+                    "total_pages": report.expected_pages,
+                    "text": text,
+                    "revised": True,
+                }) + "\n"
+
+    yield json.dumps({
+        "event": "done",
+        "status": report.status,
+        "total_pages": report.total_pages,
+    }) + "\n"
+
+
+@router.post("/upload/stream")
+async def upload_report_stream(file: UploadFile = File(...)):
+    """Upload a PDF report and stream its pages back as they are parsed.
+
+    The response is newline-delimited JSON: a `report` event carrying the id
+    straight away, one `page` event per parsed page, then a `done` event.
+    Pages are cleaned one at a time while streaming; once the whole report
+    is normalised, any page whose text changed is sent again as a `page`
+    event with `"revised": true`, matching what `/report/{id}` returns.
+    Parsing continues in the background if the client disconnects, and
+    parsed pages can be fetched from `/report/{id}/page/{n}` meanwhile.
+    """
+    try:
+        file_id, file_path = await _save_upload(file)
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Upload error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    report = StoredReport(
+        id=file_id,
+        filename=file.filename,
+        file_size=file.size,
+        upload_date=datetime.now().isoformat(),
+        status="parsing",
+    )
+    reports_store[file_id] = report
+    progress = asyncio.Condition()
+
+    task = detached_task(_parse_report(report, file_path, progress))
+    _parse_tasks.add(task)
+    task.add_done_callback(_parse_tasks.discard)
+
+    print(f"📤 Report uploaded, streaming pages: {file.filename} ({file_id})")
+    return StreamingResponse(
+        _stream_pages(report, progress),
+        media_type="application/x-ndjson",
+        # Stop nginx from buffering the stream until parsing finishes
+        headers={"X-Accel-Buffering": "no", "Cache-Control": "no-cache"},
+    )
+
 @router.get("/report/{report_id}")
 async def get_report(report_id: str):
     """Get report by ID."""
-    if report_id not in reports_store:
+    report = await get_stored_report(report_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    return report.to_dict()
+
+@router.get("/report/{report_id}/page/{page_number}")
+async def get_report_page(report_id: str, page_number: int):
+    """Get a single page of a report, including one that is still parsing."""
+    report = await get_stored_report(report_id)
+    if report is None:
         raise HTTPException(status_code=404, detail="Report not found")
-    
-    return reports_store[report_id]
+
+    if page_number < 1 or (report.status != "parsing" and page_number > report.total_pages):
+        raise HTTPException(status_code=404, detail="Page not found")
+
+    if page_number > report.total_pages:
+        raise HTTPException(status_code=409, detail="Page not parsed yet")
+
+    return {
+        "report_id": report_id,
+        "page_number": page_number,
+        "total_pages": report.expected_pages,
+        "status": report.status,
+        "text": report.page_text(page_number),
+    }
 
 @router.get("/pdf/{file_id}")
 async def get_pdf(file_id: str):
     """Get PDF file for viewing."""
     file_path = os.path.join(UPLOAD_DIR, f"{file_id}.pdf")
-    
+    if not os.path.exists(file_path):
+        # Reports preloaded by `python -m app.ingest`
+        file_path = os.path.join(settings.LIBRARY_DIR, f"{file_id}.pdf")
+
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="PDF file not found")
-    
+
     from fastapi.responses import FileResponse
     return FileResponse(file_path, media_type="application/pdf")
@@ -1,19 +1,176 @@
-from openai import OpenAI
+import asyncio
+import random
+from typing import Optional
+from openai import (
+    APIConnectionError, APITimeoutError, AsyncOpenAI, InternalServerError, RateLimitError
+)
 from app.config import settings
+from app.services.llm_admission import Priority, admission, estimate_tokens
+from app.services.llm_latency import latency_tracker
+from app.services.model_router import ModelRouter, model_router
+from app.services.profiling import stage
 
 # Initialize OpenAI client
 try:
     if not settings.OPENAI_API_KEY:  # ← HERE! Gets API key from settings
         raise ValueError("OPENAI_API_KEY environment variable not set")
     
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)  # ← HERE! Uses the API key
-    print(f"✅ OpenAI initialized with model: {settings.OPENAI_MODEL}")
+    # Retries are handled by ChatGPTService._complete so 429s pause every
+    # caller and retries respect each task's deadline. The async client lets
+    # a timed-out or losing hedged request be cancelled mid-flight.
+    client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, max_retries=0)  # ← HERE! Uses the API key
+    print(f"✅ OpenAI initialized with models: {', '.join(route['model'] for route in settings.OPENAI_MODEL_ROUTES)}")
 except Exception as e:
     print(f"❌ OpenAI initialization error: {e}")
     client = None
 
+def _retry_after(error: RateLimitError, attempt: int) -> float:
+    """Seconds to wait after a 429, from the response headers if present."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return min(2 ** attempt, 30)
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff for retryable upstream errors."""
+    cap = min(settings.OPENAI_RETRY_MAX_SECONDS, settings.OPENAI_RETRY_BASE_SECONDS * 2 ** attempt)
+    return random.uniform(0, cap)
+
+
+# Errors worth another attempt; anything else (bad request, auth) fails fast
+RETRYABLE_ERRORS = (APITimeoutError, APIConnectionError, InternalServerError)
+
+
 class ChatGPTService:
-    MODEL = settings.OPENAI_MODEL
+    @staticmethod
+    async def _attempt(task: str, priority: Priority, deadline: float, kwargs: dict,
+                       admitted: Optional[asyncio.Event] = None):
+        """One upstream call: wait for admission, then run the completion.
+
+        `admitted` is set once the admission layer lets the call through.
+        """
+        prompt = "".join(m["content"] for m in kwargs["messages"])
+        estimated = estimate_tokens(prompt) + kwargs.get("max_tokens", settings.OPENAI_MAX_TOKENS)
+        with stage("admission_wait", task=task):
+            await admission.acquire(estimated, priority)
+        if admitted is not None:
+            admitted.set()
+        actual = None
+        try:
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            timeout = max(0.1, deadline - started)
+            model_key = ModelRouter.latency_key(kwargs["model"])
+            try:
+                with stage("model_wait", task=task, model=kwargs["model"]):
+                    response = await client.chat.completions.create(**kwargs, timeout=timeout)
+            except APITimeoutError:
+                # Count the timeout so routing steers away from a slow model
+                latency_tracker.record(model_key, loop.time() - started)
+                raise
+            elapsed = loop.time() - started
+            latency_tracker.record(task, elapsed)
+            latency_tracker.record(model_key, elapsed)
+            if response.usage is not None:
+                actual = response.usage.total_tokens
+            return response
+        finally:
+            admission.release(estimated, actual)
+
+    @staticmethod
+    async def _hedged(task: str, priority: Priority, deadline: float, kwargs: dict):
+        """Run an attempt, sending a duplicate if it is slower than usual.
+
+        The hedge goes out once the first request has been running upstream
+        for the task's configured latency percentile; whichever answers
+        first wins and the other is cancelled. Time spent queued for
+        admission does not count, and nothing is hedged while the first
+        request is still queued: the percentile measures upstream latency
+        only, and a duplicate would just spend quota when it is scarce.
+        """
+        loop = asyncio.get_running_loop()
+        if task not in settings.OPENAI_HEDGE_TASKS:
+            return await ChatGPTService._attempt(task, priority, deadline, kwargs)
+
+        hedge_after = latency_tracker.percentile(task, settings.OPENAI_HEDGE_PERCENTILE)
+        if hedge_after is None:
+            hedge_after = settings.OPENAI_HEDGE_DELAY_SECONDS
+
+        admitted = asyncio.Event()
+        attempts = [asyncio.ensure_future(
+            ChatGPTService._attempt(task, priority, deadline, kwargs, admitted)
+        )]
+        try:
+            # The hedge clock starts once the first request is upstream
+            admission_wait = asyncio.ensure_future(admitted.wait())
+            try:
+                await asyncio.wait([attempts[0], admission_wait], return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                admission_wait.cancel()
+            if admitted.is_set():
+                done, _ = await asyncio.wait(attempts, timeout=hedge_after)
+                if not done and deadline - loop.time() > 0:
+                    print(f"🔀 Hedging {task} request after {hedge_after:.1f}s upstream")
+                    attempts.append(asyncio.ensure_future(
+                        ChatGPTService._attempt(task, priority, deadline, kwargs)
+                    ))
+            pending = set(attempts)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None:
+                        return attempt.result()
+                    error = attempt.exception()
+            raise error
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+    @staticmethod
+    async def _complete(task: str, priority: Priority = Priority.INTERACTIVE, **kwargs):
+        """Run a chat completion within the task's deadline.
+
+        The model and `max_tokens` are chosen per attempt by the model
+        router. Calls go through the admission layer, are retried with
+        jittered backoff on retryable errors (a 429 also pauses every other
+        caller) and may be hedged. Raises TimeoutError once the deadline
+        passes.
+        """
+        loop = asyncio.get_running_loop()
+        budget = settings.OPENAI_DEADLINES.get(task, settings.OPENAI_DEFAULT_DEADLINE)
+        deadline = loop.time() + budget
+        prompt_tokens = estimate_tokens("".join(m["content"] for m in kwargs["messages"]))
+        attempt = 0
+        while True:
+            route = model_router.select(
+                task, prompt_tokens, kwargs.get("max_tokens", settings.OPENAI_MAX_TOKENS)
+            )
+            print(f"🧭 {task}: {route['model']} (~{prompt_tokens} prompt tokens, max_tokens={route['max_tokens']})")
+            try:
+                async with asyncio.timeout_at(deadline):
+                    return await ChatGPTService._hedged(task, priority, deadline, {**kwargs, **route})
+            except TimeoutError:
+                raise TimeoutError(f"{task} did not finish within its {budget:.0f}s deadline")
+            except RateLimitError as e:
+                if attempt >= settings.OPENAI_MAX_RETRIES:
+                    raise
+                delay = _retry_after(e, attempt)
+                print(f"⏳ OpenAI rate limited, retrying in {delay:.1f}s")
+                admission.backoff(delay)
+            except RETRYABLE_ERRORS as e:
+                delay = _backoff_delay(attempt)
+                if attempt >= settings.OPENAI_MAX_RETRIES or loop.time() + delay >= deadline:
+                    raise
+                print(f"🔁 {task} failed ({type(e).__name__}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+            attempt += 1
     
     @staticmethod
     async def summarize(text: str, max_length: int = 200) -> str:
@@ -25,10 +182,10 @@ class ChatGPTService:
             if not text or len(text.strip()) == 0:
                 raise Exception("Text cannot be empty")
             
-            print(f"📝 Summarizing {len(text)} characters with {ChatGPTService.MODEL}...")
+            print(f"📝 Summarizing {len(text)} characters...")
             
-            response = client.chat.completions.create(
-                model=ChatGPTService.MODEL,
+            response = await ChatGPTService._complete(
+                task="summarize",
                 messages=[
                     {
                         "role": "system",
@@ -40,7 +197,8 @@ class ChatGPTService:
                     }
                 ],
                 temperature=settings.OPENAI_TEMPERATURE,
-                max_tokens=300
+                max_tokens=300,
+                priority=Priority.BULK
             )
             
             result = response.choices[0].message.content
@@ -60,10 +218,10 @@ class ChatGPTService:
             if not highlighted_text or len(highlighted_text.strip()) == 0:
                 raise Exception("Text cannot be empty")
             
-            print(f"💡 Explaining text with {ChatGPTService.MODEL}...")
+            print(f"💡 Explaining text...")
             
-            response = client.chat.completions.create(
-                model=ChatGPTService.MODEL,
+            response = await ChatGPTService._complete(
+                task="explain",
                 messages=[
                     {
                         "role": "system",
@@ -75,7 +233,8 @@ class ChatGPTService:
                     }
                 ],
                 temperature=settings.OPENAI_TEMPERATURE,
-                max_tokens=settings.OPENAI_MAX_TOKENS
+                max_tokens=settings.OPENAI_MAX_TOKENS,
+                priority=Priority.INTERACTIVE
             )
             
             result = response.choices[0].message.content
@@ -86,28 +245,34 @@ class ChatGPTService:
             raise Exception(f"Explanation failed: {str(e)}")
 
     @staticmethod
-    async def ask_question(question: str, report_text: str) -> str:
-        """Answer questions about the report."""
+    async def ask_question(question: str, report_text: str, history: list = None) -> str:
+        """Answer questions about the report.
+
+        `history` holds earlier turns of the conversation as chat messages
+        (see `Conversation.messages`).
+        """
         try:
             if not settings.OPENAI_API_KEY:
                 raise Exception("OpenAI API key not set")
             
-            print(f"❓ Answering question with {ChatGPTService.MODEL}...")
+            print(f"❓ Answering question...")
             
-            response = client.chat.completions.create(
-                model=ChatGPTService.MODEL,
+            response = await ChatGPTService._complete(
+                task="ask_question",
                 messages=[
                     {
                         "role": "system",
                         "content": "You are an expert engineering analyst. Answer questions based on the provided report context."
                     },
+                    *(history or []),
                     {
                         "role": "user",
                         "content": f"Based on this report:\n\n{report_text[:2000]}\n\nQuestion: {question}"
                     }
                 ],
                 temperature=settings.OPENAI_TEMPERATURE,
-                max_tokens=settings.OPENAI_MAX_TOKENS
+                max_tokens=settings.OPENAI_MAX_TOKENS,
+                priority=Priority.INTERACTIVE
             )
             
             return response.choices[0].message.content
@@ -115,6 +280,40 @@ class ChatGPTService:
             print(f"❌ ChatGPT question error: {str(e)}")
             raise Exception(f"Question answering failed: {str(e)}")
 
+    @staticmethod
+    async def summarize_conversation(summary: str, turns: list) -> str:
+        """Fold earlier question/answer turns into a rolling summary."""
+        try:
+            if not settings.OPENAI_API_KEY:
+                raise Exception("OpenAI API key not set")
+            
+            print(f"🗜️ Compacting {len(turns)} conversation turn(s)...")
+            
+            transcript = "\n\n".join(
+                f"Q: {turn['question']}\nA: {turn['answer']}" for turn in turns
+            )
+            response = await ChatGPTService._complete(
+                task="summarize_conversation",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You condense conversations about a technical report. Keep the facts, numbers and conclusions a follow-up question might rely on. Reply with the summary only."
+                    },
+                    {
+                        "role": "user",
+                        "content": f"Summary so far:\n{summary or '(none)'}\n\nNew turns:\n{transcript}\n\nWrite an updated summary in under 150 words."
+                    }
+                ],
+                temperature=0.3,
+                max_tokens=250,
+                priority=Priority.BULK
+            )
+            
+            return response.choices[0].message.content
+        except Exception as e:
+            print(f"❌ ChatGPT conversation summary error: {str(e)}")
+            raise Exception(f"Conversation summary failed: {str(e)}")
+
     @staticmethod
     async def explain_equation(equation: str, context: str = "") -> str:
         """Explain mathematical equations step-by-step."""
@@ -122,10 +321,10 @@ class ChatGPTService:
             if not settings.OPENAI_API_KEY:
                 raise Exception("OpenAI API key not set")
             
-            print(f"📐 Explaining equation with {ChatGPTService.MODEL}...")
+            print(f"📐 Explaining equation...")
             
-            response = client.chat.completions.create(
-                model=ChatGPTService.MODEL,
+            response = await ChatGPTService._complete(
+                task="explain_equation",
                 messages=[
                     {
                         "role": "system",
@@ -137,7 +336,8 @@ class ChatGPTService:
                     }
                 ],
                 temperature=settings.OPENAI_TEMPERATURE,
-                max_tokens=settings.OPENAI_MAX_TOKENS
+                max_tokens=settings.OPENAI_MAX_TOKENS,
+                priority=Priority.INTERACTIVE
             )
             
             return response.choices[0].message.content
@@ -155,10 +355,10 @@ class ChatGPTService:
             if not text or len(text.strip()) == 0:
                 raise Exception("Text cannot be empty")
             
-            print(f"📚 Extracting definitions with {ChatGPTService.MODEL}...")
+            print(f"📚 Extracting definitions...")
             
-            response = client.chat.completions.create(
-                model=ChatGPTService.MODEL,
+            response = await ChatGPTService._complete(
+                task="extract_definitions",
                 messages=[
                     {
                         "role": "system",
@@ -170,7 +370,8 @@ class ChatGPTService:
                     }
                 ],
                 temperature=0.5,
-                max_tokens=settings.OPENAI_MAX_TOKENS
+                max_tokens=settings.OPENAI_MAX_TOKENS,
+                priority=Priority.BULK
             )
             
             definitions = response.choices[0].message.content
@@ -179,3 +380,47 @@ class ChatGPTService:
         except Exception as e:
             print(f"❌ ChatGPT definition error: {str(e)}")
             raise Exception(f"Definition extraction failed: {str(e)}")
+
+    @staticmethod
+    async def define_terms(terms: list, context: str = "") -> dict:
+        """Define a specific list of terms. Returns {term: definition}."""
+        try:
+            if not settings.OPENAI_API_KEY:
+                raise Exception("OpenAI API key not set")
+            
+            if not terms:
+                return {}
+            
+            print(f"📚 Defining {len(terms)} term(s)...")
+            
+            term_list = "\n".join(f"- {term}" for term in terms)
+            response = await ChatGPTService._complete(
+                task="define_terms",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You are an expert at defining technical terms. Give one clear, general definition per term suitable for engineering students. Format each line as: TERM: definition"
+                    },
+                    {
+                        "role": "user",
+                        "content": f"Define these technical terms:\n{term_list}\n\nContext: {context}"
+                    }
+                ],
+                temperature=0.5,
+                max_tokens=settings.OPENAI_MAX_TOKENS,
+                priority=Priority.INTERACTIVE
+            )
+            
+            content = response.choices[0].message.content or ""
+            requested = {term.lower(): term for term in terms}
+            definitions = {}
+            for line in content.splitlines():
+                name, sep, definition = line.partition(":")
+                name = name.strip(" -*•\t").lower()
+                if sep and name in requested and definition.strip():
+                    definitions[requested[name]] = definition.strip()
+            print(f"✅ Terms defined: {len(definitions)}/{len(terms)}")
+            return definitions
+        except Exception as e:
+            print(f"❌ ChatGPT term definition error: {str(e)}")
+            raise Exception(f"Term definition failed: {str(e)}")
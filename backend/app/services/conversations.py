@@ -0,0 +1,237 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.services.chatgpt_service import ChatGPTService
+from app.services.llm_admission import estimate_tokens
+from app.services.profiling import detached_task
+
+
+class Conversation:
+    """Follow-up question context for one reader and report.
+
+    Recent turns are kept verbatim; once they exceed the token budget the
+    oldest are folded into `summary`, so the prompt stays roughly constant
+    in size however long the conversation runs. Instances are snapshots
+    loaded from `ConversationStore`.
+    """
+
+    __slots__ = ("id", "report_id", "summary", "turns", "updated")
+
+    def __init__(self, id: str, report_id: Optional[str], summary: str = "",
+                 turns: Optional[List[dict]] = None, updated: Optional[float] = None):
+        self.id = id
+        self.report_id = report_id
+        self.summary = summary
+        # Each turn is {"seq", "question", "answer"}; seq orders turns and
+        # marks how far a compaction got
+        self.turns: List[dict] = turns if turns is not None else []
+        self.updated = updated if updated is not None else time.time()
+
+    def messages(self) -> List[dict]:
+        """Chat messages carrying the conversation so far."""
+        messages = []
+        if self.summary:
+            messages.append({
+                "role": "system",
+                "content": f"Summary of the earlier conversation: {self.summary}",
+            })
+        for turn in self.turns:
+            messages.append({"role": "user", "content": turn["question"]})
+            messages.append({"role": "assistant", "content": turn["answer"]})
+        return messages
+
+    def token_count(self) -> int:
+        text = self.summary + "".join(t["question"] + t["answer"] for t in self.turns)
+        return estimate_tokens(text)
+
+    def needs_compaction(self) -> bool:
+        return (
+            len(self.turns) > settings.CONVERSATION_KEEP_TURNS
+            and self.token_count() > settings.CONVERSATION_TOKEN_BUDGET
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "conversation_id": self.id,
+            "report_id": self.report_id,
+            "summary": self.summary,
+            "turns": [{"question": t["question"], "answer": t["answer"]} for t in self.turns],
+            "tokens": self.token_count(),
+        }
+
+
+class ConversationStore:
+    """Conversations kept in SQLite so every worker process sees them.
+
+    Ids are always generated here, never taken from clients. Turns are
+    appended as rows, so workers answering the same conversation at once
+    do not overwrite each other. Methods block on SQLite; call them from
+    async code through `asyncio.to_thread`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        # Compactions running in this process, one per conversation
+        self._compacting: Dict[str, asyncio.Task] = {}
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS conversations (
+                    id TEXT PRIMARY KEY,
+                    report_id TEXT,
+                    summary TEXT NOT NULL DEFAULT '',
+                    updated REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS conversations_report ON conversations (report_id);
+                CREATE INDEX IF NOT EXISTS conversations_updated ON conversations (updated);
+                CREATE TABLE IF NOT EXISTS turns (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    conversation_id TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    answer TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS turns_conversation ON turns (conversation_id);
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, report_id: Optional[str]) -> Conversation:
+        self.prune()
+        conversation = Conversation(str(uuid.uuid4()), report_id)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO conversations (id, report_id, updated) VALUES (?, ?, ?)",
+                (conversation.id, report_id, conversation.updated),
+            )
+        return conversation
+
+    def get(self, conversation_id: str) -> Optional[Conversation]:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT report_id, summary, updated FROM conversations WHERE id = ?",
+            (conversation_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        turns = [
+            {"seq": seq, "question": question, "answer": answer}
+            for seq, question, answer in conn.execute(
+                "SELECT seq, question, answer FROM turns WHERE conversation_id = ? ORDER BY seq",
+                (conversation_id,),
+            )
+        ]
+        return Conversation(conversation_id, row[0], row[1], turns, row[2])
+
+    def add_turn(self, conversation: Conversation, question: str, answer: str) -> None:
+        conversation.updated = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO turns (conversation_id, question, answer) VALUES (?, ?, ?)",
+                (conversation.id, question, answer),
+            )
+            conn.execute(
+                "UPDATE conversations SET updated = ? WHERE id = ?",
+                (conversation.updated, conversation.id),
+            )
+        conversation.turns.append({"seq": cursor.lastrowid, "question": question, "answer": answer})
+
+    def apply_compaction(self, conversation_id: str, previous_summary: str,
+                         summary: str, last_seq: int) -> bool:
+        """Replace turns up to `last_seq` with `summary`.
+
+        Skipped (returns False) if another worker changed the summary since
+        `previous_summary` was read; turns added meanwhile are kept.
+        """
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE conversations SET summary = ? WHERE id = ? AND summary = ?",
+                (summary, conversation_id, previous_summary),
+            ).rowcount
+            if updated:
+                conn.execute(
+                    "DELETE FROM turns WHERE conversation_id = ? AND seq <= ?",
+                    (conversation_id, last_seq),
+                )
+        return bool(updated)
+
+    def schedule_compaction(self, conversation: Conversation) -> None:
+        """Summarise old turns in the background if over budget.
+
+        Runs after the answer has been returned so the reader never waits
+        for it; at most one compaction per conversation runs at a time in
+        this process.
+        """
+        if not conversation.needs_compaction():
+            return
+        running = self._compacting.get(conversation.id)
+        if running is not None and not running.done():
+            return
+        task = detached_task(self._compact(conversation))
+        self._compacting[conversation.id] = task
+        task.add_done_callback(lambda done: self._compacting.pop(conversation.id, None))
+
+    async def _compact(self, conversation: Conversation) -> None:
+        old_turns = conversation.turns[:-settings.CONVERSATION_KEEP_TURNS]
+        try:
+            summary = await ChatGPTService.summarize_conversation(conversation.summary, old_turns)
+            applied = await asyncio.to_thread(
+                self.apply_compaction, conversation.id, conversation.summary,
+                summary, old_turns[-1]["seq"],
+            )
+        except Exception as e:
+            # Keep the turns; the next answer will try again
+            print(f"⚠️ Conversation compaction failed ({conversation.id}): {e}")
+            return
+        if applied:
+            print(f"🗜️ Conversation {conversation.id} compacted "
+                  f"({len(old_turns)} turns folded into the summary)")
+
+    def delete(self, conversation_id: str) -> bool:
+        with self._connect() as conn:
+            deleted = conn.execute(
+                "DELETE FROM conversations WHERE id = ?", (conversation_id,)
+            ).rowcount
+            conn.execute("DELETE FROM turns WHERE conversation_id = ?", (conversation_id,))
+        return bool(deleted)
+
+    def remove_report(self, report_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM turns WHERE conversation_id IN "
+                "(SELECT id FROM conversations WHERE report_id = ?)",
+                (report_id,),
+            )
+            conn.execute("DELETE FROM conversations WHERE report_id = ?", (report_id,))
+
+    def prune(self) -> None:
+        """Drop conversations idle past the TTL and the oldest over the cap."""
+        cutoff = time.time() - settings.CONVERSATION_TTL_MINUTES * 60
+        with self._connect() as conn:
+            conn.execute("DELETE FROM conversations WHERE updated < ?", (cutoff,))
+            conn.execute(
+                "DELETE FROM conversations WHERE id IN (SELECT id FROM conversations "
+                "ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+                (settings.CONVERSATION_MAX_SESSIONS,),
+            )
+            conn.execute(
+                "DELETE FROM turns WHERE conversation_id NOT IN (SELECT id FROM conversations)"
+            )
+
+
+conversation_store = ConversationStore(settings.CONVERSATION_STORE_PATH)
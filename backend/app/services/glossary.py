@@ -0,0 +1,171 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from array import array
+from datetime import datetime
+from typing import Iterable, Optional
+
+from app.config import settings
+
+_NON_WORD = re.compile(r"[^\w\s\-]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def term_hash(term: str) -> int:
+    """Stable 64-bit hash of a term, the same in every worker and restart."""
+    digest = hashlib.blake2b(term.lower().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+class GlossaryStore:
+    """Term definitions shared by every report.
+
+    A term is defined once by the model and then served from here for every
+    later report that uses it. The store also keeps the document frequency
+    of candidate terms across stored reports, which `TermExtractor` uses for
+    TF-IDF ranking. Terms are counted by hash (each report keeps a packed
+    array of them), so a report costs a few kilobytes here whatever its
+    length. Entries live in SQLite so every worker process shares them and
+    they survive restarts; methods block, so call them from async code
+    through `asyncio.to_thread`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    term TEXT NOT NULL,
+                    definition TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    created TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS document_terms (
+                    document_id TEXT PRIMARY KEY,
+                    terms BLOB NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS document_frequency (
+                    term INTEGER PRIMARY KEY,
+                    count INTEGER NOT NULL
+                );
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def normalize(term: str) -> str:
+        """Lowercase a term and strip punctuation so lookups match loosely."""
+        return _WHITESPACE.sub(" ", _NON_WORD.sub(" ", term)).strip().lower()
+
+    def get(self, term: str) -> Optional[dict]:
+        row = self._connect().execute(
+            "SELECT term, definition, source, created FROM entries WHERE key = ?",
+            (self.normalize(term),),
+        ).fetchone()
+        if row is None:
+            return None
+        return {"term": row[0], "definition": row[1], "source": row[2], "created": row[3]}
+
+    def add(self, term: str, definition: str, source: str) -> dict:
+        """Store a definition; an existing entry for the term is kept."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO entries (key, term, definition, source, created) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.normalize(term), term.strip(), definition.strip(), source,
+                 datetime.now().isoformat()),
+            )
+        return self.get(term)
+
+    def register_document(self, document_id: str, terms: Iterable[str]) -> None:
+        """Count the candidate terms of a stored report for TF-IDF.
+
+        Pass the pruned list from `TermExtractor.document_terms`.
+        Registering a report again replaces its earlier terms.
+        """
+        hashes = array("q", {term_hash(term) for term in terms})
+        with self._connect() as conn:
+            # Take the write lock before reading the old terms, so two
+            # workers registering the same report do not both count it
+            conn.execute("BEGIN IMMEDIATE")
+            self._forget(conn, document_id)
+            conn.execute(
+                "INSERT INTO document_terms (document_id, terms) VALUES (?, ?)",
+                (document_id, hashes.tobytes()),
+            )
+            conn.executemany(
+                "INSERT INTO document_frequency (term, count) VALUES (?, 1) "
+                "ON CONFLICT (term) DO UPDATE SET count = count + 1",
+                ((term,) for term in hashes),
+            )
+
+    def unregister_document(self, document_id: str) -> None:
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._forget(conn, document_id)
+
+    @staticmethod
+    def _forget(conn: sqlite3.Connection, document_id: str) -> None:
+        # Decrement only the document's own terms and drop zero counts
+        row = conn.execute(
+            "SELECT terms FROM document_terms WHERE document_id = ?", (document_id,)
+        ).fetchone()
+        if row is None:
+            return
+        hashes = array("q")
+        hashes.frombytes(row[0])
+        conn.executemany(
+            "UPDATE document_frequency SET count = count - 1 WHERE term = ?",
+            ((term,) for term in hashes),
+        )
+        conn.executemany(
+            "DELETE FROM document_frequency WHERE term = ? AND count <= 0",
+            ((term,) for term in hashes),
+        )
+        conn.execute("DELETE FROM document_terms WHERE document_id = ?", (document_id,))
+
+    def has_document(self, document_id: str) -> bool:
+        return self._connect().execute(
+            "SELECT 1 FROM document_terms WHERE document_id = ?", (document_id,)
+        ).fetchone() is not None
+
+    def document_frequency(self, term: str) -> int:
+        row = self._connect().execute(
+            "SELECT count FROM document_frequency WHERE term = ?", (term_hash(term),)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def is_candidate(self, term: str) -> bool:
+        """True if some stored report uses `term` as a candidate term.
+
+        Only such terms get shared, context-free glossary definitions.
+        """
+        return self.document_frequency(self.normalize(term)) > 0
+
+    @property
+    def document_count(self) -> int:
+        return self._connect().execute("SELECT count(*) FROM document_terms").fetchone()[0]
+
+    def stats(self) -> dict:
+        conn = self._connect()
+        return {
+            "terms": conn.execute("SELECT count(*) FROM entries").fetchone()[0],
+            "documents": self.document_count,
+        }
+
+
+glossary_store = GlossaryStore(settings.GLOSSARY_STORE_PATH)
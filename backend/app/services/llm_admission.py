@@ -0,0 +1,176 @@
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+from typing import List, Optional
+
+from app.config import settings
+
+
+class Priority(IntEnum):
+    """Admission priority; lower values are served first."""
+    INTERACTIVE = 0  # highlight explain, equations, questions
+    BULK = 1         # whole-report summaries and definition extraction
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for English text (about four characters a token)."""
+    return len(text) // 4 + 1
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously up to `capacity`."""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+            self.updated = now
+
+    def delay_for(self, amount: float, now: float) -> float:
+        """Seconds until `amount` tokens are available (0 if they are now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount: float) -> None:
+        # May go negative when a call used more than was reserved; the debt
+        # is paid back by the refill before anything else is admitted.
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AdmissionController:
+    """Gate in front of the OpenAI client.
+
+    Calls wait here until both the requests-per-minute and tokens-per-minute
+    buckets can cover them. Waiters are served by priority, then arrival
+    order, so interactive calls overtake queued bulk work. An upstream 429
+    pauses all admissions for the retry-after period.
+
+    State lives in the process. Each web worker runs its own controller
+    with a 1/WEB_CONCURRENCY share of the account quota, so together they
+    stay within it; a 429 pauses only the worker that received it, and
+    the others back off when their own calls are rejected.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+        self._waiters: List[tuple] = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._wakeup_at = 0.0
+        self.in_flight = 0
+        self.admitted = 0
+        self.rate_limited = 0
+
+    async def acquire(self, tokens: int, priority: Priority = Priority.INTERACTIVE) -> None:
+        """Wait until a call estimated at `tokens` may go upstream.
+
+        Every successful `acquire` must be paired with a `release`.
+        """
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), tokens, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as the caller gave up: hand the budget back
+                self.requests.refund(1)
+                self.tokens.refund(tokens)
+            else:
+                future.cancel()
+                self._dispatch()
+            raise
+        self.in_flight += 1
+
+    def release(self, estimated_tokens: int, actual_tokens: Optional[int] = None) -> None:
+        """Finish an admitted call, correcting the estimate with real usage."""
+        self.in_flight -= 1
+        if actual_tokens is not None:
+            difference = estimated_tokens - actual_tokens
+            if difference > 0:
+                self.tokens.refund(difference)
+            else:
+                self.tokens.consume(-difference)
+        self._dispatch()
+
+    def backoff(self, seconds: float) -> None:
+        """Stop admitting calls for `seconds` after an upstream 429."""
+        self.rate_limited += 1
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        while self._waiters:
+            _, _, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            delay = max(
+                self._paused_until - now,
+                self.requests.delay_for(1, now),
+                self.tokens.delay_for(tokens, now),
+            )
+            if delay > 0:
+                self._schedule(now + delay)
+                return
+            heapq.heappop(self._waiters)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self.admitted += 1
+            future.set_result(None)
+
+    def _schedule(self, when: float) -> None:
+        if self._wakeup is not None and not self._wakeup.cancelled() and self._wakeup_at <= when:
+            return
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+        loop = asyncio.get_running_loop()
+        self._wakeup_at = when
+        self._wakeup = loop.call_later(max(0.0, when - time.monotonic()), self._on_wakeup)
+
+    def _on_wakeup(self) -> None:
+        self._wakeup = None
+        self._dispatch()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        queued = {priority.name.lower(): 0 for priority in Priority}
+        for priority, _, _, future in self._waiters:
+            if not future.done():
+                queued[Priority(priority).name.lower()] += 1
+        self.requests._refill(now)
+        self.tokens._refill(now)
+        return {
+            "workers_sharing_quota": settings.WEB_CONCURRENCY,
+            "queue_depth": sum(queued.values()),
+            "queued": queued,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "rate_limited": self.rate_limited,
+            "paused_for_seconds": round(max(0.0, self._paused_until - now), 2),
+            "requests_available": int(self.requests.tokens),
+            "tokens_available": int(self.tokens.tokens),
+        }
+
+
+admission = AdmissionController(
+    max(1, settings.OPENAI_REQUESTS_PER_MINUTE // settings.WEB_CONCURRENCY),
+    max(1, settings.OPENAI_TOKENS_PER_MINUTE // settings.WEB_CONCURRENCY),
+)
@@ -0,0 +1,57 @@
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from app.config import settings
+
+
+class LatencyTracker:
+    """Rolling window of recent call latencies, keyed by task or model.
+
+    Samples also expire after `max_age` seconds. A model the router stops
+    sending calls to gets no new samples, so expiry is what lets it fall
+    back under the sample minimum and be tried again.
+    """
+
+    def __init__(self, window: int = 200, max_age: float = 300):
+        self.window = window
+        self.max_age = max_age
+        self._samples: Dict[str, Deque[Tuple[float, float]]] = {}
+
+    def record(self, key: str, seconds: float) -> None:
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append((time.monotonic(), seconds))
+
+    def _recent(self, key: str) -> List[float]:
+        samples = self._samples.get(key)
+        if not samples:
+            return []
+        cutoff = time.monotonic() - self.max_age
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        return [seconds for _, seconds in samples]
+
+    def percentile(self, key: str, q: float, min_samples: int = 20) -> Optional[float]:
+        """The `q` (0-1) latency percentile, or None with too few samples."""
+        samples = self._recent(key)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[index]
+
+    def stats(self) -> dict:
+        return {
+            key: {
+                "samples": len(self._recent(key)),
+                "p50": self.percentile(key, 0.5, min_samples=1),
+                "p95": self.percentile(key, 0.95, min_samples=1),
+            }
+            for key in list(self._samples)
+        }
+
+
+latency_tracker = LatencyTracker(max_age=settings.OPENAI_LATENCY_WINDOW_SECONDS)
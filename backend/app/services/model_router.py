@@ -0,0 +1,61 @@
+from typing import List
+
+from app.config import settings
+from app.services.llm_latency import latency_tracker
+
+
+class ModelRouter:
+    """Pick the model and completion budget for each call.
+
+    Routes are tried in table order, so cheap fast models listed first take
+    the short interactive work they are configured for and longer prompts
+    fall through to larger models. A model that has recently been slow for
+    the task's deadline is passed over while another route fits.
+    """
+
+    def __init__(self, routes: List[dict]):
+        if not routes:
+            raise ValueError("At least one model route is required")
+        self.routes = routes
+
+    @staticmethod
+    def latency_key(model: str) -> str:
+        return f"model:{model}"
+
+    def select(self, task: str, prompt_tokens: int, max_tokens: int) -> dict:
+        """Return `{"model", "max_tokens"}` for a call."""
+        eligible = [
+            route for route in self.routes
+            if (not route.get("tasks") or task in route["tasks"])
+            and prompt_tokens <= route.get("max_input_tokens", float("inf"))
+        ]
+        if not eligible:
+            # Nothing fits: use the route with the largest input allowance
+            eligible = [max(self.routes, key=lambda r: r.get("max_input_tokens", float("inf")))]
+
+        deadline = settings.OPENAI_DEADLINES.get(task, settings.OPENAI_DEFAULT_DEADLINE)
+        latency_budget = deadline * settings.OPENAI_ROUTE_LATENCY_FRACTION
+        route = eligible[0]
+        for candidate in eligible:
+            p90 = latency_tracker.percentile(self.latency_key(candidate["model"]), 0.9)
+            if p90 is None or p90 <= latency_budget:
+                route = candidate
+                break
+
+        return {
+            "model": route["model"],
+            "max_tokens": min(max_tokens, route.get("max_output_tokens", max_tokens)),
+        }
+
+    def stats(self) -> List[dict]:
+        return [
+            {
+                **route,
+                "p50": latency_tracker.percentile(self.latency_key(route["model"]), 0.5, min_samples=1),
+                "p90": latency_tracker.percentile(self.latency_key(route["model"]), 0.9, min_samples=1),
+            }
+            for route in self.routes
+        ]
+
+
+model_router = ModelRouter(settings.OPENAI_MODEL_ROUTES)
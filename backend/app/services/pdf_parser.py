@@ -1,37 +1,36 @@
 import PyPDF2
 import re
 from typing import List, Dict
+from app.services.profiling import stage
 
 class PDFParser:
     @staticmethod
-    def extract_text(file_path: str) -> str:
-        """Extract text from PDF file."""
+    def open_document(file_path: str) -> PyPDF2.PdfReader:
+        """Open a PDF for page-at-a-time extraction."""
         try:
-            text = ""
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-            return text
+            with stage("open_document"):
+                return PyPDF2.PdfReader(file_path)
         except Exception as e:
             raise Exception(f"Error parsing PDF: {str(e)}")
 
     @staticmethod
-    def extract_text_by_page(file_path: str) -> list:
-        """Extract text page by page."""
+    def extract_page(pdf_reader: PyPDF2.PdfReader, index: int) -> str:
+        """Extract the text of one (0-based) page from an open document."""
         try:
-            pages = []
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for i, page in enumerate(pdf_reader.pages):
-                    pages.append({
-                        "page_number": i + 1,
-                        "text": page.extract_text()
-                    })
-            return pages
+            with stage("extract_page", page=index + 1):
+                return pdf_reader.pages[index].extract_text()
         except Exception as e:
             raise Exception(f"Error parsing PDF: {str(e)}")
-    
+
+    @staticmethod
+    def extract_pages(file_path: str) -> List[str]:
+        """Extract the text of each page in a single pass over the PDF."""
+        pdf_reader = PDFParser.open_document(file_path)
+        return [
+            PDFParser.extract_page(pdf_reader, i)
+            for i in range(len(pdf_reader.pages))
+        ]
+
     @staticmethod
     def detect_equations(text: str) -> List[Dict]:
         """Detect mathematical equations from text with improved patterns."""
@@ -0,0 +1,235 @@
+import asyncio
+import hmac
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+_PROFILE_ID = re.compile(r"[0-9a-f]{12}")
+
+_active_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("active_profile", default=None)
+
+
+def is_authorized(token: Optional[str]) -> bool:
+    """Profiling is off unless PROFILING_TOKEN is set and the token matches."""
+    if not settings.PROFILING_TOKEN or not token:
+        return False
+    # compare_digest only takes ASCII str, so compare bytes
+    return hmac.compare_digest(token.encode(), settings.PROFILING_TOKEN.encode())
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class RequestProfile:
+    """Stage timings and sampled stacks for a single request.
+
+    A sampler thread records the stacks of the request's event-loop thread,
+    plus any worker thread while it is inside a stage, every
+    `PROFILING_INTERVAL_MS`. Samples are kept as folded stacks
+    (`frame;frame;frame count`), the input format of flamegraph.pl and
+    speedscope, rooted at the stage that was running. The event-loop thread
+    is shared, so its samples can include other requests running alongside.
+    """
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.created = time.time()
+        self.started = time.perf_counter()
+        self.duration = None
+        self.stages: List[dict] = []
+        self.samples: Counter = Counter()
+        self._main_ident = threading.get_ident()
+        self._threads: Dict[int, List[str]] = {self._main_ident: []}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_loop, name=f"profiler-{self.id}", daemon=True)
+
+    def start(self) -> None:
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self.duration = time.perf_counter() - self.started
+        self._stop.set()
+        self._sampler.join(timeout=1)
+
+    def _sample_loop(self) -> None:
+        interval = settings.PROFILING_INTERVAL_MS / 1000
+        own_ident = threading.get_ident()
+        while not self._stop.wait(interval):
+            frames = sys._current_frames()
+            with self._lock:
+                threads = [(ident, list(stack)) for ident, stack in self._threads.items()]
+            for ident, stages in threads:
+                frame = frames.get(ident)
+                if frame is None or ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.reverse()
+                root = [f"[stage] {name}" for name in stages] or ["[stage] request"]
+                self.samples[";".join(root + stack)] += 1
+
+    @contextmanager
+    def stage(self, name: str, **detail):
+        ident = threading.get_ident()
+        with self._lock:
+            stack = self._threads.setdefault(ident, [])
+            stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                # Concurrent coroutines on one thread can finish out of
+                # order, so drop this stage's own entry rather than the top
+                del stack[len(stack) - 1 - stack[::-1].index(name)]
+                # Worker threads are only sampled while inside a stage
+                if not stack and ident != self._main_ident:
+                    self._threads.pop(ident, None)
+                self.stages.append({
+                    "name": name,
+                    "start_ms": round((start - self.started) * 1000, 3),
+                    "duration_ms": round((end - start) * 1000, 3),
+                    **detail,
+                })
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+    def summary(self) -> dict:
+        totals: Dict[str, dict] = {}
+        for entry in self.stages:
+            total = totals.setdefault(entry["name"], {"count": 0, "total_ms": 0.0})
+            total["count"] += 1
+            total["total_ms"] = round(total["total_ms"] + entry["duration_ms"], 3)
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "created": self.created,
+            "duration_ms": round((self.duration or 0) * 1000, 3),
+            "samples": sum(self.samples.values()),
+            "stage_totals": totals,
+        }
+
+    def to_dict(self) -> dict:
+        return {**self.summary(), "stages": self.stages, "folded": self.folded()}
+
+
+class ProfileStore:
+    """The most recent request profiles, kept on disk for download.
+
+    Each profile is a JSON file in `directory`, so a profile recorded by one
+    worker can be fetched through any other. Only the newest `max_profiles`
+    files are kept. Methods do file I/O; call them from async code through
+    `asyncio.to_thread`.
+    """
+
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = directory
+        self.max_profiles = max_profiles
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, profile_id: str) -> Optional[str]:
+        if not _PROFILE_ID.fullmatch(profile_id):
+            return None
+        return os.path.join(self.directory, f"{profile_id}.json")
+
+    def _files(self) -> List[os.DirEntry]:
+        entries = [e for e in os.scandir(self.directory) if e.name.endswith(".json")]
+        return sorted(entries, key=lambda e: e.stat().st_mtime, reverse=True)
+
+    def add(self, profile: RequestProfile) -> None:
+        path = self._path(profile.id)
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(profile.to_dict(), f)
+        os.replace(temporary, path)
+        for entry in self._files()[self.max_profiles:]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        path = self._path(profile_id)
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (TypeError, FileNotFoundError):
+            return None
+
+    def list(self) -> List[dict]:
+        profiles = []
+        for entry in self._files():
+            try:
+                with open(entry.path) as f:
+                    profile = json.load(f)
+            except (FileNotFoundError, ValueError):
+                continue
+            profile.pop("stages", None)
+            profile.pop("folded", None)
+            profiles.append(profile)
+        return profiles
+
+
+profile_store = ProfileStore(settings.PROFILES_DIR, settings.PROFILES_KEPT)
+
+
+def detached_task(coro) -> asyncio.Task:
+    """Start a background task that outlives the request creating it.
+
+    The task does not inherit the request's profile, which is stopped and
+    stored when the response goes out.
+    """
+    context = copy_context()
+    context.run(_active_profile.set, None)
+    return asyncio.create_task(coro, context=context)
+
+
+@contextmanager
+def profile_request(method: str, path: str):
+    """Profile everything run in this context; yields the profile.
+
+    Save it with `profile_store.add` once the context exits.
+    """
+    profile = RequestProfile(method, path)
+    token = _active_profile.set(profile)
+    profile.start()
+    try:
+        yield profile
+    finally:
+        profile.stop()
+        _active_profile.reset(token)
+
+
+@contextmanager
+def stage(name: str, **detail):
+    """Time a named stage of the current request if it is being profiled.
+
+    A no-op unless a profile is active, so call sites can stay in place.
+    The active profile follows the request into tasks and `to_thread`.
+    """
+    profile = _active_profile.get()
+    if profile is None:
+        yield
+        return
+    with profile.stage(name, **detail):
+        yield
@@ -0,0 +1,79 @@
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Optional, Set
+
+from app.config import settings
+from app.models.report import StoredReport
+
+
+class ReportArchive:
+    """Reports preloaded by the bulk-ingest command, kept on disk.
+
+    Each row holds a report's text buffer and its page offsets as packed
+    bytes, keyed by id and by the SHA-256 of the source PDF so re-running
+    an ingest skips files that are already in. Web workers load rows into
+    the in-memory store on first use.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS reports (
+                    id TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    file_size INTEGER NOT NULL,
+                    upload_date TEXT NOT NULL,
+                    content_hash TEXT NOT NULL UNIQUE,
+                    text TEXT NOT NULL,
+                    page_offsets BLOB NOT NULL
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def save(self, report: StoredReport, content_hash: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO reports "
+                "(id, filename, file_size, upload_date, content_hash, text, page_offsets) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    report.id, report.filename, report.file_size, report.upload_date,
+                    content_hash, report.text, report.page_offsets.tobytes(),
+                ),
+            )
+
+    def load(self, report_id: str) -> Optional[StoredReport]:
+        row = self._connect().execute(
+            "SELECT filename, file_size, upload_date, text, page_offsets FROM reports WHERE id = ?",
+            (report_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        offsets = array("L")
+        offsets.frombytes(row[4])
+        return StoredReport(report_id, row[0], row[1], row[2], text=row[3], page_offsets=offsets)
+
+    def ingested_hashes(self) -> Set[str]:
+        rows = self._connect().execute("SELECT content_hash FROM reports")
+        return {row[0] for row in rows}
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+
+report_archive = ReportArchive(settings.REPORT_ARCHIVE_PATH)
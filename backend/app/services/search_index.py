@@ -0,0 +1,135 @@
+import os
+import re
+import sqlite3
+import threading
+from typing import List
+
+from app.config import settings
+from app.models.report import StoredReport
+
+_QUERY_TOKEN = re.compile(r'"[^"]+"|[\w\-]+')
+
+
+class SearchIndex:
+    """Full-text index over the page text of every uploaded report.
+
+    Backed by an SQLite FTS5 table on disk, so the inverted index is compact,
+    updated incrementally per report and readable by every worker process.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            # Page metadata lives in a plain table keyed by the FTS rowid so
+            # a report's pages can be found without scanning the index.
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS page_meta (
+                    rowid INTEGER PRIMARY KEY,
+                    report_id TEXT NOT NULL,
+                    page_number INTEGER NOT NULL,
+                    filename TEXT
+                );
+                CREATE INDEX IF NOT EXISTS page_meta_report ON page_meta (report_id);
+                CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+                    text, tokenize = 'porter unicode61'
+                );
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets readers in other workers run
+        # while one worker is indexing.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add_report(self, report: StoredReport) -> int:
+        """Index (or re-index) every page of a report. Returns pages indexed."""
+        rows = [
+            (page["text"], report.id, page["page_number"], report.filename)
+            for page in report.iter_pages()
+            if page["text"] and page["text"].strip()
+        ]
+        with self._connect() as conn:
+            self._delete(conn, report.id)
+            for text, report_id, page_number, filename in rows:
+                cursor = conn.execute(
+                    "INSERT INTO page_meta (report_id, page_number, filename) VALUES (?, ?, ?)",
+                    (report_id, page_number, filename),
+                )
+                conn.execute(
+                    "INSERT INTO pages (rowid, text) VALUES (?, ?)",
+                    (cursor.lastrowid, text),
+                )
+        return len(rows)
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, report_id: str) -> None:
+        conn.execute(
+            "DELETE FROM pages WHERE rowid IN (SELECT rowid FROM page_meta WHERE report_id = ?)",
+            (report_id,),
+        )
+        conn.execute("DELETE FROM page_meta WHERE report_id = ?", (report_id,))
+
+    def remove_report(self, report_id: str) -> None:
+        with self._connect() as conn:
+            self._delete(conn, report_id)
+
+    @staticmethod
+    def build_query(query: str) -> str:
+        """Turn free text into an FTS5 query; every word (or quoted phrase) must match."""
+        tokens = []
+        for token in _QUERY_TOKEN.findall(query):
+            token = token.strip('"').replace('"', "")
+            if token.strip():
+                tokens.append(f'"{token}"')
+        return " ".join(tokens)
+
+    def search(self, query: str, limit: int = 20, report_id: str = None) -> List[dict]:
+        """Return the best-matching pages, ranked by BM25, with snippets."""
+        match = self.build_query(query)
+        if not match:
+            return []
+
+        sql = (
+            "SELECT m.report_id, m.filename, m.page_number, bm25(pages) AS score, "
+            "snippet(pages, 0, '<mark>', '</mark>', '…', 24) "
+            "FROM pages JOIN page_meta AS m ON m.rowid = pages.rowid "
+            "WHERE pages MATCH ?"
+        )
+        params: list = [match]
+        if report_id:
+            sql += " AND m.report_id = ?"
+            params.append(report_id)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+
+        rows = self._connect().execute(sql, params).fetchall()
+        return [
+            {
+                "report_id": row[0],
+                "filename": row[1],
+                "page_number": row[2],
+                # bm25() is lower-is-better; flip it so higher ranks first.
+                # Unrounded: in a small corpus scores can be tiny
+                "score": -row[3],
+                "snippet": row[4],
+            }
+            for row in rows
+        ]
+
+    def stats(self) -> dict:
+        conn = self._connect()
+        pages = conn.execute("SELECT count(*) FROM page_meta").fetchone()[0]
+        reports = conn.execute("SELECT count(DISTINCT report_id) FROM page_meta").fetchone()[0]
+        return {"reports": reports, "pages": pages}
+
+
+search_index = SearchIndex(settings.SEARCH_INDEX_PATH)
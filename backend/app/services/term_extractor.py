@@ -0,0 +1,203 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+# Words that never start, end or sit inside a candidate term.
+STOPWORDS = frozenset("""
+a about above after again against all also an and any are as at be because been
+before being below between both but by can could did do does doing down during
+each either few for from further had has have having here how however if in into
+is it its itself just may might more most must no nor not of off on once only or
+other our out over own per same shall should since so some such than that the
+their them then there these they this those through thus to too under until up
+upon use used using very via was we were what when where whether which while who
+whom why will with within without would yet figure fig table section page chapter
+equation eq see shown show shows given respectively et al ie eg
+discuss discusses discussed describe describes described present presents
+presented provide provides provided include includes included obtain obtains
+obtained calculate calculated compute computed based following well define
+defines defined report reports throughout study studies paper article
+""".split())
+
+_TOKEN = re.compile(r"[A-Za-z][A-Za-z\-']*[A-Za-z]|[^\sA-Za-z]")
+_ACRONYM = re.compile(r"\(([A-Z][A-Za-z]*[A-Z][a-z]?s?|[A-Z][a-z])\)")
+_DEFINITION = re.compile(
+    r"(?<![\w\-])((?:[A-Za-z][\w\-]*\s+){0,3}[A-Za-z][\w\-]*)"
+    r"(?:\s+\([^)\n]{1,15}\))?"
+    r"\s+(?:is defined as|are defined as|refers to|refer to|is known as|denotes|is termed|is called)\s+"
+    r"([^.;\n]{8,200})"
+)
+_WHITESPACE = re.compile(r"\s+")
+
+MAX_NGRAM = 3
+# Single words shorter than this are too generic to rank as terms
+MIN_SINGLE_WORD_LENGTH = 6
+
+
+def _overlaps(a: str, b: str) -> bool:
+    """True if one phrase contains the other or they share an edge word run."""
+    if f" {a} " in f" {b} " or f" {b} " in f" {a} ":
+        return True
+    a_words, b_words = a.split(), b.split()
+    for n in range(1, min(len(a_words), len(b_words))):
+        if a_words[-n:] == b_words[:n] or b_words[-n:] == a_words[:n]:
+            return True
+    return False
+
+
+class TermExtractor:
+    """Model-free detection of candidate glossary terms.
+
+    Terms come from three sources, in order of confidence: acronyms defined
+    in the text ("Finite Element Analysis (FEA)"), explicit definition
+    phrases ("X is defined as ..."), and frequent phrases ranked by TF-IDF
+    against the reports already uploaded.
+    """
+
+    @staticmethod
+    def find_acronyms(text: str) -> Dict[str, str]:
+        """Return {acronym: expansion} for acronyms introduced in brackets."""
+        acronyms = {}
+        for match in _ACRONYM.finditer(text):
+            acronym = match.group(1)
+            letters = [c.lower() for c in acronym if c.isupper()]
+            words = text[max(0, match.start() - 120):match.start()].split()
+            for k in range(1, min(len(words), len(letters) + 2) + 1):
+                candidate = words[-k:]
+                if candidate[0].lower() in STOPWORDS:
+                    continue
+                content = [w for w in candidate if w.lower() not in STOPWORDS]
+                if content[0][0].lower() == letters[0] and len(content) >= len(letters):
+                    acronyms.setdefault(acronym, " ".join(candidate).strip(",;:"))
+                    break
+        return acronyms
+
+    @staticmethod
+    def find_definitions(text: str) -> Dict[str, str]:
+        """Return {term: definition} for "X is defined as Y" style phrases."""
+        definitions = {}
+        for match in _DEFINITION.finditer(text):
+            words = match.group(1).split()
+            # The term is the words after the last stopword ("In this study
+            # the critical load" -> "critical load"); "of" may sit inside a
+            # term, as in "modulus of elasticity"
+            for i in range(len(words) - 1, -1, -1):
+                if words[i].lower() in STOPWORDS and words[i].lower() != "of":
+                    words = words[i + 1:]
+                    break
+            while words and words[0].lower() in STOPWORDS:
+                words.pop(0)
+            if not words:
+                continue
+            term = " ".join(words)
+            definition = _WHITESPACE.sub(" ", match.group(2)).strip()
+            definitions.setdefault(term, definition[0].upper() + definition[1:])
+        return definitions
+
+    @staticmethod
+    def candidate_terms(text: str) -> Counter:
+        """Count 1-3 word phrases that do not cross punctuation or stopwords."""
+        counts: Counter = Counter()
+        run: List[str] = []
+
+        def flush():
+            for n in range(1, MAX_NGRAM + 1):
+                for i in range(len(run) - n + 1):
+                    counts[" ".join(run[i:i + n])] += 1
+            run.clear()
+
+        for token in _TOKEN.findall(text):
+            word = token.lower()
+            if len(word) < 3 or word in STOPWORDS or not word[0].isalpha():
+                flush()
+            else:
+                run.append(word)
+        flush()
+        return counts
+
+    @staticmethod
+    def is_term_phrase(phrase: str) -> bool:
+        """True if a phrase from `candidate_terms` is shaped like a term."""
+        return " " in phrase or len(phrase) >= MIN_SINGLE_WORD_LENGTH
+
+    @staticmethod
+    def document_terms(text: str, limit: int) -> List[str]:
+        """The `limit` most frequent term phrases used at least twice.
+
+        This is what a report contributes to the glossary's document
+        frequencies; phrases used once never rank as candidates anyway.
+        """
+        counts = TermExtractor.candidate_terms(text)
+        frequent = [
+            (tf, phrase) for phrase, tf in counts.items()
+            if tf >= 2 and TermExtractor.is_term_phrase(phrase)
+        ]
+        return [phrase for _, phrase in heapq.nlargest(limit, frequent)]
+
+    @staticmethod
+    def extract_candidates(
+        text: str,
+        document_frequency: Optional[Callable[[str], int]] = None,
+        total_documents: int = 0,
+        limit: int = 10,
+    ) -> List[dict]:
+        """Rank candidate terms for a piece of text.
+
+        Each candidate is `{"term", "score", "source"}` plus a `definition`
+        when the text itself defines the term.
+        """
+        candidates: Dict[str, dict] = {}
+
+        for acronym, expansion in TermExtractor.find_acronyms(text).items():
+            candidates[acronym.lower()] = {
+                "term": acronym,
+                "definition": expansion,
+                "source": "acronym",
+                "score": math.inf,
+            }
+        for term, definition in TermExtractor.find_definitions(text).items():
+            candidates.setdefault(term.lower(), {
+                "term": term,
+                "definition": definition,
+                "source": "definition",
+                "score": math.inf,
+            })
+
+        # Phrases from acronym expansions would only repeat the acronym
+        known = {c["definition"].lower() for c in candidates.values() if c["source"] == "acronym"}
+
+        idf_base = total_documents + 1
+        for phrase, tf in TermExtractor.candidate_terms(text).items():
+            if tf < 2 or phrase in candidates or any(_overlaps(phrase, k) for k in known):
+                continue
+            if not TermExtractor.is_term_phrase(phrase):
+                continue
+            n_words = phrase.count(" ") + 1
+            df = document_frequency(phrase) if document_frequency else 0
+            idf = math.log(idf_base / (1 + df)) + 1
+            candidates[phrase] = {
+                "term": phrase,
+                "source": "tfidf",
+                "score": tf * idf * n_words,
+            }
+
+        ranked = sorted(candidates.values(), key=lambda c: c["score"], reverse=True)
+        # Drop phrases that overlap a higher-ranked phrase, so a repeated
+        # sentence does not yield every one of its sliding n-grams
+        selected: List[dict] = []
+        for candidate in ranked:
+            if candidate["source"] == "tfidf" and any(
+                _overlaps(candidate["term"], chosen["term"].lower()) for chosen in selected
+            ):
+                continue
+            selected.append(candidate)
+            if len(selected) >= limit:
+                break
+        for candidate in selected:
+            if candidate["score"] != math.inf:
+                candidate["score"] = round(candidate["score"], 3)
+            else:
+                candidate["score"] = None
+        return selected
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from app.services.llm_admission import AdmissionController, Priority, TokenBucket
+
+
+def test_token_bucket_delay_and_refill():
+    bucket = TokenBucket(capacity=10, refill_per_second=2)
+    now = bucket.updated
+    assert bucket.delay_for(10, now) == 0
+    bucket.consume(10)
+    assert bucket.delay_for(4, now) == pytest.approx(2)
+    # Requests larger than the bucket only wait for a full bucket
+    assert bucket.delay_for(50, now) == pytest.approx(5)
+    assert bucket.delay_for(4, now + 2) == 0
+    assert bucket.tokens == pytest.approx(4)
+
+
+def test_token_bucket_refund_is_capped():
+    bucket = TokenBucket(capacity=10, refill_per_second=1)
+    bucket.consume(3)
+    bucket.refund(5)
+    assert bucket.tokens == 10
+
+
+def test_interactive_calls_overtake_queued_bulk_work():
+    async def run():
+        # 100 requests a second, starting empty: every call has to queue
+        controller = AdmissionController(requests_per_minute=6000, tokens_per_minute=100000)
+        controller.requests.tokens = 0
+        order = []
+
+        async def call(name, priority):
+            await controller.acquire(10, priority)
+            order.append(name)
+            controller.release(10, 10)
+
+        bulk = [asyncio.create_task(call(f"bulk{n}", Priority.BULK)) for n in range(2)]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call("interactive", Priority.INTERACTIVE))
+        await asyncio.gather(*bulk, interactive)
+        return order
+
+    assert asyncio.run(run()) == ["interactive", "bulk0", "bulk1"]
+
+
+def test_cancelled_waiter_frees_its_place():
+    async def run():
+        controller = AdmissionController(requests_per_minute=6000, tokens_per_minute=100000)
+        controller.requests.tokens = 0
+        first = asyncio.create_task(controller.acquire(10))
+        second = asyncio.create_task(controller.acquire(10))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        await asyncio.wait_for(second, timeout=1)
+        return controller
+
+    controller = asyncio.run(run())
+    assert controller.admitted == 1
+    assert controller.in_flight == 1
+
+
+def test_cancel_right_after_admission_refunds_the_budget():
+    async def run():
+        controller = AdmissionController(requests_per_minute=60, tokens_per_minute=1000)
+        controller.requests.tokens = 0
+        task = asyncio.create_task(controller.acquire(100))
+        await asyncio.sleep(0)
+        # Budget arrives and the waiter is admitted, but the caller gives
+        # up before it resumes
+        controller.requests.tokens = 1
+        controller._dispatch()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return controller
+
+    controller = asyncio.run(run())
+    assert controller.requests.tokens == pytest.approx(1, abs=0.1)
+    assert controller.tokens.tokens == pytest.approx(1000)
+    assert controller.in_flight == 0
+
+
+def test_release_corrects_the_token_estimate():
+    async def run():
+        controller = AdmissionController(requests_per_minute=60, tokens_per_minute=1000)
+        await controller.acquire(300)
+        controller.release(300, actual_tokens=100)
+        await controller.acquire(100)
+        controller.release(100, actual_tokens=400)
+        return controller
+
+    controller = asyncio.run(run())
+    assert controller.tokens.tokens == pytest.approx(500, abs=1)
+    assert controller.in_flight == 0
@@ -0,0 +1,49 @@
+import pytest
+
+from app.models.report import StoredReport
+
+
+def _report(**kwargs) -> StoredReport:
+    return StoredReport("r1", "report.pdf", 1024, "2024-01-01T00:00:00", **kwargs)
+
+
+def test_from_pages_builds_offsets_into_one_buffer():
+    report = StoredReport.from_pages("r1", "report.pdf", 1024, "2024-01-01T00:00:00",
+                                     ["first page", "", "third"])
+    assert report.text == "first page\n\nthird\n"
+    assert list(report.page_offsets) == [0, 11, 12]
+    assert report.total_pages == 3
+    assert [report.page_text(n) for n in (1, 2, 3)] == ["first page", "", "third"]
+
+
+def test_page_text_rejects_out_of_range_pages():
+    report = StoredReport.from_pages("r1", "report.pdf", 1024, "2024-01-01T00:00:00", ["only"])
+    with pytest.raises(IndexError):
+        report.page_text(0)
+    with pytest.raises(IndexError):
+        report.page_text(2)
+
+
+def test_append_page_serves_pages_before_and_after_joining():
+    report = _report(status="parsing")
+    assert report.append_page("one") == 1
+    assert report.append_page("two") == 2
+    assert report.page_text(2) == "two"
+    assert report.text == "one\ntwo\n"
+    assert report.append_page("three") == 3
+    assert [page["text"] for page in report.iter_pages()] == ["one", "two", "three"]
+    assert report.text == "one\ntwo\nthree\n"
+    assert list(report.page_offsets) == [0, 4, 8]
+
+
+def test_replace_pages_swaps_text_and_keeps_expected_pages():
+    report = _report(status="parsing", expected_pages=3)
+    for page in ("raw one", "raw two", "raw three"):
+        report.append_page(page)
+    report.replace_pages(["one", "two", "three"])
+    assert report.text == "one\ntwo\nthree\n"
+    assert report.page_text(3) == "three"
+    assert report.expected_pages == 3
+    report.append_page("four")
+    assert report.page_text(4) == "four"
+    assert report.to_dict()["pages"][3] == {"page_number": 4, "text": "four"}
@@ -0,0 +1,54 @@
+from app.services.term_extractor import TermExtractor
+
+
+def test_find_acronyms_matches_expansion_letters():
+    text = ("The Power Spectral Density (PSD) of the signal and a Finite Element "
+            "Analysis (FEA) of the frame were computed.")
+    assert TermExtractor.find_acronyms(text) == {
+        "PSD": "Power Spectral Density",
+        "FEA": "Finite Element Analysis",
+    }
+
+
+def test_find_acronyms_skips_brackets_without_expansion():
+    assert TermExtractor.find_acronyms("Results are listed in the appendix (AB).") == {}
+
+
+def test_find_definitions_trims_leading_words():
+    text = ("In this study the critical load is defined as the load at which "
+            "specimen B3 buckled during test run 7.")
+    assert TermExtractor.find_definitions(text) == {
+        "critical load": "The load at which specimen B3 buckled during test run 7",
+    }
+
+
+def test_find_definitions_keeps_of_inside_terms():
+    text = "The modulus of elasticity is defined as the ratio of stress to strain."
+    assert TermExtractor.find_definitions(text) == {
+        "modulus of elasticity": "The ratio of stress to strain",
+    }
+
+
+def test_find_definitions_ignores_pronoun_subjects():
+    assert TermExtractor.find_definitions("This is defined as the limit state.") == {}
+
+
+def test_document_terms_keeps_repeated_term_phrases():
+    text = ("The beam deflection was measured. The beam deflection grew. "
+            "Shear force rose once. Loads were applied.")
+    terms = TermExtractor.document_terms(text, limit=10)
+    assert set(terms) == {"beam deflection", "deflection"}
+    assert len(TermExtractor.document_terms(text, limit=1)) == 1
+
+
+def test_extract_candidates_ranks_defined_terms_first():
+    text = ("Power Spectral Density (PSD) was computed. The beam deflection was "
+            "measured twice; the beam deflection was small.")
+    candidates = TermExtractor.extract_candidates(text, lambda term: 0, 0)
+    assert candidates[0] == {
+        "term": "PSD", "definition": "Power Spectral Density", "source": "acronym", "score": None,
+    }
+    assert candidates[1]["term"] == "beam deflection"
+    assert candidates[1]["source"] == "tfidf"
+    # Phrases from the acronym's expansion would only repeat it
+    assert all("spectral" not in c["term"] for c in candidates[1:])
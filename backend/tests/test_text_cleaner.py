@@ -0,0 +1,75 @@
+from utils.text_cleaner import clean_page, find_boilerplate, normalize_pages
+
+
+def test_clean_page_collapses_whitespace():
+    assert clean_page("Stress  \t analysis\n\n\n\nof   beams ") == "Stress analysis\n\nof beams"
+
+
+def test_clean_page_keeps_numeric_lines():
+    table = "A1\n1200\nA2\n980\n450"
+    assert clean_page(table) == table
+
+
+def test_clean_page_rejoins_line_break_hyphenation():
+    assert clean_page("The structural load on the struc-\ntural frame") == \
+        "The structural load on the structural frame"
+
+
+def test_clean_page_rejoins_words_split_by_syllable():
+    assert clean_page("the stress was calcu-\nlated per beam") == "the stress was calculated per beam"
+
+
+def test_clean_page_keeps_hyphenated_compounds():
+    assert clean_page("a well-\nknown non-\nlinear model") == "a well-known non-linear model"
+    assert clean_page("the flow was low and the low-\nspeed flow was tested") == \
+        "the flow was low and the low-speed flow was tested"
+
+
+def test_find_boilerplate_finds_running_headers():
+    pages = [f"ACME Lab Report 2023\nBody text {n}\nmore body\nand more\nend {n}" for n in range(4)]
+    assert find_boilerplate(pages) == {"acme lab report #"}
+
+
+def test_find_boilerplate_ignores_table_rows_differing_in_numbers():
+    pages = [
+        f"Specimen S{n} 20.{n} kN 1{n}00 cycles\nTest {n} body\nmore of page {n}\n"
+        f"end of page {n}\nSpecimen S{n + 4} 2{n}.3 kN 900 cycles"
+        for n in range(4)
+    ]
+    assert find_boilerplate(pages) == set()
+
+
+def test_find_boilerplate_ignores_numbers_only():
+    pages = [f"1200\nbody {n}\nmore {n}\nend {n}\n980" for n in range(4)]
+    assert find_boilerplate(pages) == set()
+
+
+def test_normalize_pages_strips_page_numbers_and_headers():
+    bodies = [
+        "The beam was loaded\nin three-point bending",
+        "Deflection grew linearly\nuntil first yield",
+        "Cracks appeared near\nthe support plates",
+        "Residual strain stayed\nbelow the limit",
+    ]
+    pages = [f"ACME Lab Report\n{body}\n{n}" for n, body in enumerate(bodies, start=1)]
+    normalized, stats = normalize_pages(pages)
+    assert normalized == bodies
+    assert stats["page_numbers"] == 4
+    assert stats["boilerplate_lines"] == 1
+    assert stats["chars_saved"] > 0
+
+
+def test_normalize_pages_keeps_table_figures():
+    pages = [f"Results {n}\nA1\n1200\nA2\n980\n450" for n in range(1, 4)]
+    normalized, _ = normalize_pages(pages)
+    for page in normalized:
+        assert "1200" in page and "980" in page and "450" in page
+
+
+def test_normalize_pages_never_empties_short_pages():
+    pages = [f"Specimen S{n} 20.3 kN 1300 cycles" for n in range(1, 5)]
+    normalized, _ = normalize_pages(pages)
+    assert normalized == pages
+    short = ["Report header\nOnly line" for _ in range(4)]
+    normalized, _ = normalize_pages(short)
+    assert all(page.strip() for page in normalized)
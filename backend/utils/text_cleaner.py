@@ -0,0 +1,216 @@
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+# Rough characters per model token, used to report estimated savings
+CHARS_PER_TOKEN = 4
+
+# Lines looked at for running headers/footers at the top and bottom of a page
+EDGE_LINES = 3
+# Longer lines are body text, never headers or footers
+MAX_BOILERPLATE_LENGTH = 100
+
+_HYPHEN_BREAK = re.compile(r"(\w+)-\n[ \t]*([a-z]\w*)")
+_PAGE_NUMBER_LINE = re.compile(
+    r"[ \t]*(?:page[ \t]+)?(\d{1,4})(?:[ \t]*(?:of|/)[ \t]*\d{1,4})?[ \t]*",
+    re.IGNORECASE,
+)
+_INLINE_SPACE = re.compile(r"[ \t\f\v\u00a0]+")
+_SPACE_AROUND_NEWLINE = re.compile(r" ?\n ?")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_DIGITS = re.compile(r"\d+")
+_WORD = re.compile(r"\w+(?:-\w+)*")
+
+# Prefixes that form hyphenated compounds ("non-linear", "self-weight")
+COMPOUND_PREFIXES = frozenset("""
+anti co counter cross high low multi non post pre quasi re self semi sub
+super two three four well
+""".split())
+
+
+def vocabulary(text: str) -> Set[str]:
+    """Lower-cased words (and hyphenated compounds with their parts) of a
+    text, used to decide how to rejoin hyphenation.
+
+    Fragments split across a line break are left out, so they do not
+    count as words in their own right.
+    """
+    words = set()
+    for word in _WORD.findall(_HYPHEN_BREAK.sub(" ", text)):
+        word = word.lower()
+        words.add(word)
+        if "-" in word:
+            words.update(word.split("-"))
+    return words
+
+
+def _rejoin_hyphen(match: re.Match, words: Set[str]) -> str:
+    head, tail = match.group(1), match.group(2)
+    compound = f"{head}-{tail}"
+    if compound.lower() in words:
+        return compound
+    if (head + tail).lower() in words:
+        return head + tail
+    # "well-\nknown" and "non-\nlinear" are compounds; "calcu-\nlated" is
+    # a word broken across lines
+    lower_head = head.lower()
+    if lower_head in COMPOUND_PREFIXES or (lower_head in words and tail.lower() in words):
+        return compound
+    return head + tail
+
+
+def clean_page(text: str, words: Optional[Set[str]] = None) -> str:
+    """Normalise one page of extracted PDF text.
+
+    Rejoins words hyphenated across line breaks and collapses runs of
+    whitespace. Whether a hyphen is kept ("well-known") or dropped
+    ("struc-tural") is decided against `words`, by default the page's own
+    vocabulary.
+    """
+    if not text:
+        return ""
+    if words is None:
+        words = vocabulary(text)
+    text = _HYPHEN_BREAK.sub(lambda m: _rejoin_hyphen(m, words), text)
+    text = _INLINE_SPACE.sub(" ", text)
+    text = _SPACE_AROUND_NEWLINE.sub("\n", text)
+    text = _BLANK_LINES.sub("\n\n", text)
+    return text.strip()
+
+
+def _filled(lines: List[str]) -> List[int]:
+    return [i for i, line in enumerate(lines) if line.strip()]
+
+
+def _edge_indexes(lines: List[str]) -> Tuple[List[int], List[int]]:
+    """Indexes of the top and bottom non-blank lines of a page.
+
+    Short pages get a narrower window so their body is never treated as
+    header or footer.
+    """
+    filled = _filled(lines)
+    width = min(EDGE_LINES, len(filled) // 3)
+    if width == 0:
+        return [], []
+    return filled[:width], filled[::-1][:width]
+
+
+def _page_number(line: str) -> Optional[int]:
+    match = _PAGE_NUMBER_LINE.fullmatch(line)
+    return int(match.group(1)) if match else None
+
+
+def strip_page_numbers(pages: List[str]) -> Tuple[List[str], int]:
+    """Remove page-number lines from the very top or bottom of pages.
+
+    A line is only taken for a page number if the same edge of a
+    neighbouring page carries the number one lower or one higher, so a
+    lone figure in a table or at the end of a page is left alone.
+    Returns the pages and the number of lines removed.
+    """
+    split = [page.split("\n") for page in pages]
+    # (line index, number) of the first and last non-blank line of each page
+    edges = []
+    for lines in split:
+        filled = _filled(lines)
+        edges.append([
+            (i, _page_number(lines[i])) for i in (filled[:1] + filled[-1:])
+        ] if len(filled) > 1 else [])
+
+    def number_at(page_index: int, side: int) -> Optional[int]:
+        if 0 <= page_index < len(edges) and edges[page_index]:
+            return edges[page_index][side][1]
+        return None
+
+    result, removed = [], 0
+    for page_index, lines in enumerate(split):
+        drop = set()
+        for side, (line_index, number) in enumerate(edges[page_index]):
+            if number is None:
+                continue
+            if (number_at(page_index - 1, side) == number - 1
+                    or number_at(page_index + 1, side) == number + 1):
+                drop.add(line_index)
+        if drop and len(drop) < len(_filled(lines)):
+            lines = [line for i, line in enumerate(lines) if i not in drop]
+            removed += len(drop)
+        result.append("\n".join(lines).strip())
+    return result, removed
+
+
+def _line_key(line: str) -> str:
+    # Dates and chapter numbers inside running headers vary, so compare
+    # mostly-word lines without digits; lines that are largely figures
+    # (table rows) must match exactly
+    line = line.strip().lower()
+    tokens = line.split()
+    numeric = sum(1 for token in tokens if any(ch.isdigit() for ch in token))
+    if numeric < len(tokens) - numeric:
+        return _DIGITS.sub("#", line)
+    return line
+
+
+def find_boilerplate(pages: List[str], min_share: float = 0.5, min_pages: int = 3) -> Set[str]:
+    """Line keys repeated at the top or bottom of at least `min_share` of pages.
+
+    Lines without any letters (figures, table cells) never count.
+    """
+    if len(pages) < min_pages:
+        return set()
+    counts: Counter = Counter()
+    for page in pages:
+        lines = page.split("\n")
+        top, bottom = _edge_indexes(lines)
+        counts.update({_line_key(lines[i]) for i in top + bottom})
+    threshold = max(2, int(len(pages) * min_share))
+    return {
+        key for key, count in counts.items()
+        if count >= threshold and len(key) <= MAX_BOILERPLATE_LENGTH
+        and any(ch.isalpha() for ch in key)
+    }
+
+
+def strip_boilerplate(page: str, boilerplate: Set[str]) -> str:
+    """Remove running header/footer lines from the edges of a page.
+
+    Only unbroken runs of boilerplate starting at the first or last line
+    are removed, and a page is never emptied completely.
+    """
+    if not boilerplate:
+        return page
+    lines = page.split("\n")
+    drop = set()
+    for edge in _edge_indexes(lines):
+        for i in edge:
+            if _line_key(lines[i]) not in boilerplate:
+                break
+            drop.add(i)
+    if not drop or len(drop) >= len(_filled(lines)):
+        return page
+    kept = [line for i, line in enumerate(lines) if i not in drop]
+    return _BLANK_LINES.sub("\n\n", "\n".join(kept)).strip()
+
+
+def normalize_pages(pages: List[str]) -> Tuple[List[str], Dict[str, int]]:
+    """Clean every page and remove page numbers and boilerplate repeated
+    across pages.
+
+    Returns the normalised pages and a stats dict with the characters and
+    estimated model tokens saved.
+    """
+    chars_before = sum(len(page) for page in pages)
+    words = vocabulary("\n".join(pages))
+    cleaned = [clean_page(page, words) for page in pages]
+    numbered, page_numbers = strip_page_numbers(cleaned)
+    boilerplate = find_boilerplate(numbered)
+    normalized = [strip_boilerplate(page, boilerplate) for page in numbered]
+    chars_after = sum(len(page) for page in normalized)
+    saved = chars_before - chars_after
+    return normalized, {
+        "chars_before": chars_before,
+        "chars_after": chars_after,
+        "chars_saved": saved,
+        "tokens_saved": saved // CHARS_PER_TOKEN,
+        "page_numbers": page_numbers,
+        "boilerplate_lines": len(boilerplate),
+    }